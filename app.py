@@ -4,13 +4,22 @@ import json
 import threading
 import time
 import base64
-import requests
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from flask import Flask, jsonify, render_template, request, send_file, flash, redirect, url_for
 
-from speedrun_api import get_outlast_wr, get_category_record, get_all_categories, OUTLAST_CATEGORIES
-from whistleblower_api import get_all_categories as get_whistleblower_categories, WHISTLEBLOWER_CATEGORIES
-from outlast2_api import get_all_categories as get_outlast2_categories, OUTLAST2_CATEGORIES
+from speedrun_api import OUTLAST_CATEGORIES, OUTLAST_GAME_KEY
+from games import GAMES, get_game
+import records
+from record_cache import record_cache
+from runner_cache import runner_names
+import upstream
+from snapshot import record_snapshot, FRESH, STALE, REVALIDATING
+from http_cache import cacheable_json, cacheable_file
+from store import record_store
+from record_changes import normalize_records, fingerprint, diff_records
+from jobs import job_queue
+from discovery import discovery_cache
 
 # Configuration
 logging.basicConfig(level=logging.DEBUG)
@@ -23,10 +32,11 @@ GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
 GITHUB_API_URL = "https://api.github.com"
 GITHUB_REPO_OWNER = os.environ.get("GITHUB_REPO_OWNER", "GrimAarkan")
 GITHUB_REPO_NAME = os.environ.get("GITHUB_REPO_NAME", "speedruntracker")
-
-GITHUB_FILENAME = "outlast_world_records_latest.txt"
-WHISTLEBLOWER_FILENAME = "outlast_whistleblower_records_latest.txt"
-OUTLAST2_FILENAME = "outlast2_records_latest.txt"
+GITHUB_BRANCH = os.environ.get("GITHUB_BRANCH", "")
+GITHUB_PUSH_RETRIES = int(os.environ.get("GITHUB_PUSH_RETRIES", "3"))
+EXPORT_MAX_WORKERS = int(os.environ.get("EXPORT_MAX_WORKERS", "3"))
+EXPORT_GAME_TIMEOUT = float(os.environ.get("EXPORT_GAME_TIMEOUT", "120"))  # seconds
+HISTORY_MAX_LIMIT = int(os.environ.get("HISTORY_MAX_LIMIT", "1000"))
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key")
@@ -36,83 +46,249 @@ app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key")
 def index():
     """Render the main page."""
     categories = [{"key": k, "name": v["name"]} for k, v in OUTLAST_CATEGORIES.items()]
-    return render_template("index.html", categories=categories)
+    # Inline the warm snapshot so the page renders without waiting on the API
+    initial_records, _, _ = record_snapshot.get(OUTLAST_GAME_KEY, wait=0)
+    return render_template("index.html", categories=categories, initial_records=initial_records)
+
+# Snapshot Helpers
+def snapshot_json(game_key, payload, age, freshness):
+    """Build a cacheable JSON response that reports the age and freshness of the snapshot behind it."""
+    if freshness == FRESH:
+        response = cacheable_json(payload, last_modified=record_snapshot.changed_at(game_key))
+    else:
+        # Let clients come back soon for the revalidated records
+        response = cacheable_json(payload, last_modified=record_snapshot.changed_at(game_key), max_age=0)
+    response.headers["X-Snapshot-Age"] = f"{age:.1f}"
+    response.headers["X-Record-Status"] = freshness
+    return response
+
+def snapshot_unavailable(error, freshness):
+    """Build the 503 returned when no servable snapshot exists."""
+    response = jsonify({"error": error})
+    response.status_code = 503
+    response.headers["X-Record-Status"] = freshness
+    response.headers["Retry-After"] = "30"
+    return response
+
+def snapshot_category_response(game_key, category_key):
+    """Serve one category's world record from the record snapshot."""
+    game = get_game(game_key)
+    if game is None or category_key not in game["categories"]:
+        return jsonify({"error": "Category not found"}), 404
+
+    game_records, age, freshness = record_snapshot.get(game_key)
+    record_data = game_records.get(category_key) if game_records else None
+    if record_data is None:
+        return snapshot_unavailable("Failed to fetch category record", freshness)
+    return snapshot_json(game_key, record_data, age, freshness)
+
+def snapshot_categories_response(game_key):
+    """Serve every category's world record of a game from the record snapshot."""
+    if get_game(game_key) is None:
+        return jsonify({"error": "Game not found"}), 404
+
+    game_records, age, freshness = record_snapshot.get(game_key)
+    if game_records is None:
+        return snapshot_unavailable("Failed to fetch category records", freshness)
+    return snapshot_json(game_key, game_records, age, freshness)
 
 @app.route("/api/outlastwr")
 def outlast_wr_api():
     """API endpoint to get the Outlast Any% world record time."""
-    try:
-        time_data = get_outlast_wr()
-        return jsonify(time_data)
-    except Exception as e:
-        logger.error(f"Error fetching WR: {str(e)}")
-        return jsonify({"error": "Failed to fetch world record data"}), 500
+    return snapshot_category_response(OUTLAST_GAME_KEY, "any%")
 
 @app.route("/api/outlast/category/<category_key>")
 def category_record_api(category_key):
     """API endpoint to get the world record for a specific category."""
-    try:
-        record_data = get_category_record(category_key)
-        if record_data is None:
-            return jsonify({"error": "Category not found"}), 404
-        return jsonify(record_data)
-    except Exception as e:
-        logger.error(f"Error fetching category record: {str(e)}")
-        return jsonify({"error": "Failed to fetch category record"}), 500
+    return snapshot_category_response(OUTLAST_GAME_KEY, category_key)
 
 @app.route("/api/outlast/categories")
 def all_categories_api():
     """API endpoint to get world records for all categories."""
+    return snapshot_categories_response(OUTLAST_GAME_KEY)
+
+@app.route("/api/games")
+def games_api():
+    """API endpoint listing every registered game and its categories."""
+    return jsonify({
+        game_key: {
+            "name": game["name"],
+            "categories": {k: v["name"] for k, v in game["categories"].items()}
+        }
+        for game_key, game in GAMES.items()
+    })
+
+@app.route("/api/games/<game_key>/category/<category_key>")
+def game_category_record_api(game_key, category_key):
+    """API endpoint to get the world record for a category of any registered game."""
+    return snapshot_category_response(game_key, category_key)
+
+@app.route("/api/games/<game_key>/categories")
+def game_categories_api(game_key):
+    """API endpoint to get world records for all categories of any registered game."""
+    return snapshot_categories_response(game_key)
+
+@app.route("/api/ready")
+def readiness_api():
+    """Readiness probe: 200 once every game can be served from the snapshot, with snapshot ages."""
+    ready, details = record_snapshot.readiness()
+    response = jsonify(details)
+    response.status_code = 200 if ready else 503
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@app.route("/api/snapshot/status")
+def snapshot_status_api():
+    """API endpoint to report when each game's records were last refreshed."""
+    return jsonify(record_snapshot.status())
+
+@app.route("/api/cache/stats")
+def cache_stats_api():
+    """API endpoint to report record and runner cache counters."""
+    return jsonify({
+        "records": record_cache.stats(),
+        "runners": runner_names.stats()
+    })
+
+@app.route("/api/upstream/stats")
+def upstream_stats_api():
+    """API endpoint to report speedrun.com request, retry and wait counters."""
+    return jsonify(upstream.stats.snapshot())
+
+# Record History
+def parse_time_arg(name):
+    """
+    Read a time query parameter given as Unix seconds or ISO 8601
+
+    Returns:
+        float: Unix time, or None if the parameter is absent
+
+    Raises:
+        ValueError: If the value is not a valid time
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
     try:
-        categories_data = get_all_categories()
-        return jsonify(categories_data)
-    except Exception as e:
-        logger.error(f"Error fetching all categories: {str(e)}")
-        return jsonify({"error": "Failed to fetch category records"}), 500
-
-# Export Functions
-def save_records_to_txt():
-    """Save all world records to a text file."""
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def parse_limit_arg():
+    """
+    Read the limit query parameter, capped at HISTORY_MAX_LIMIT
+
+    Returns:
+        int: The limit, HISTORY_MAX_LIMIT if the parameter is absent
+
+    Raises:
+        ValueError: If the value is not a positive integer
+    """
+    limit = int(request.args.get("limit", HISTORY_MAX_LIMIT))
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    return min(limit, HISTORY_MAX_LIMIT)
+
+@app.route("/api/games/<game_key>/category/<category_key>/history")
+def category_history_api(game_key, category_key):
+    """API endpoint to get a category's world record progression over a time range."""
+    game = get_game(game_key)
+    if game is None or category_key not in game["categories"]:
+        return jsonify({"error": "Category not found"}), 404
     try:
-        categories_data = get_all_categories()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"outlast_world_records_{timestamp}.txt"
-        file_path = os.path.join(EXPORT_DIR, filename)
-
-        valid_categories = {k: v for k, v in categories_data.items() if v is not None and v.get("raw_time", 0) > 1}
-
-        with open(file_path, 'w') as f:
-            f.write(f"As of: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ")
-            f.write(f"from: https://www.speedrun.com/outlast | ")
-
-            for record in valid_categories.values():
-                f.write(f"{record['category']} ")
-                f.write(f": {record['detailed_time']} ")
-                f.write(f"by: {record['runner']} ")
-                f.write(" | ")
-
-        app.config['LATEST_EXPORT'] = file_path
-        logger.info(f"Auto-export completed: {file_path}")
-        return file_path
+        since, until = parse_time_arg("since"), parse_time_arg("until")
+        limit = parse_limit_arg()
+    except ValueError:
+        return jsonify({"error": "since and until must be Unix times or ISO 8601 dates, limit an integer"}), 400
+    return jsonify({
+        "game": game_key,
+        "category": category_key,
+        "since": since,
+        "until": until,
+        "progression": record_store.record_progression(game_key, category_key, since, until, limit)
+    })
+
+@app.route("/api/games/<game_key>/category/<category_key>/top")
+def category_top_api(game_key, category_key):
+    """API endpoint to get a category's best runs, optionally for another subcategory given as var-<id>=<value>."""
+    game = get_game(game_key)
+    if game is None or category_key not in game["categories"]:
+        return jsonify({"error": "Category not found"}), 404
+    try:
+        n = min(max(int(request.args.get("n", 10)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "n must be an integer"}), 400
+    variables = [{"id": key[len("var-"):], "value": value}
+                 for key, value in request.args.items() if key.startswith("var-")]
+    try:
+        runs, fresh = records.get_category_top(game_key, category_key, n, variables or None)
     except Exception as e:
-        logger.error(f"Error in auto-export: {str(e)}")
-        return None
-
-
+        logger.error(f"Error reading {game_key}/{category_key} leaderboard: {str(e)}")
+        return jsonify({"error": "Failed to read category leaderboard"}), 500
+    if runs is None:
+        # The leaderboard is downloading in the background; don't hold a worker for it
+        return snapshot_unavailable("Category leaderboard is loading, try again shortly", REVALIDATING)
+
+    payload = {"game": game_key, "category": category_key, "variables": variables or None, "runs": runs}
+    if fresh:
+        response = cacheable_json(payload)
+    else:
+        # Let clients come back soon for the reloaded leaderboard
+        response = cacheable_json(payload, max_age=0)
+    response.headers["X-Record-Status"] = FRESH if fresh else STALE
+    return response
+
+@app.route("/api/records/changes")
+def record_changes_api():
+    """API endpoint to list world record changes after a point in time, optionally for one game."""
+    game_key = request.args.get("game")
+    if game_key is not None and get_game(game_key) is None:
+        return jsonify({"error": "Game not found"}), 404
+    try:
+        since = parse_time_arg("since")
+        limit = parse_limit_arg()
+    except ValueError:
+        return jsonify({"error": "since must be a Unix time or ISO 8601 date, limit an integer"}), 400
+    if since is None:
+        return jsonify({"error": "since is required"}), 400
+    return jsonify({
+        "since": since,
+        "changes": record_store.changes_since(since, game_key, limit)
+    })
 
-def save_whistleblower_records_to_txt():
-    """Save all world records for Outlast: Whistleblower to a text file."""
+# Export Functions
+def export_records_data(game_key):
+    """
+    Get the records a game's export is built from
+
+    Exports read the record snapshot, so they match what the API serves and
+    add no upstream requests of their own. Only a game with no servable
+    snapshot is fetched directly.
+
+    Returns:
+        dict: Category keys to record data
+    """
+    categories_data, _, _ = record_snapshot.get(game_key)
+    if categories_data is None:
+        logger.warning(f"No {game_key} snapshot to export from, fetching records directly")
+        categories_data = records.get_all_categories(game_key)
+    return categories_data
+
+def save_game_records_to_txt(game_key, categories_data=None):
+    """Save all world records for a registered game to a text file, reading the snapshot unless given."""
+    game = get_game(game_key)
     try:
-        categories_data = get_whistleblower_categories()
+        if categories_data is None:
+            categories_data = export_records_data(game_key)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"outlast_whistleblower_records_{timestamp}.txt"
+        filename = f"{game['export_prefix']}_{timestamp}.txt"
         file_path = os.path.join(EXPORT_DIR, filename)
 
         valid_categories = {k: v for k, v in categories_data.items() if v is not None and v.get("raw_time", 0) > 1}
 
         with open(file_path, 'w') as f:
             f.write(f"As of: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ")
-            f.write(f"from: https://www.speedrun.com/outlast | ")
+            f.write(f"from: {game['weblink']} | ")
 
             for record in valid_categories.values():
                 f.write(f"{record['category']} ")
@@ -120,39 +296,101 @@ def save_whistleblower_records_to_txt():
                 f.write(f"by: {record['runner']} ")
                 f.write(" | ")
 
-        app.config['LATEST_WHISTLEBLOWER_EXPORT'] = file_path
-        logger.info(f"Whistleblower export completed: {file_path}")
+        record_store.set_latest_export(game_key, file_path)
+        logger.info(f"{game['label']} export completed: {file_path}")
         return file_path
     except Exception as e:
-        logger.error(f"Error in Whistleblower export: {str(e)}")
+        logger.error(f"Error in {game['label']} export: {str(e)}")
         return None
 
-def save_outlast2_records_to_txt():
-    """Save all world records for Outlast 2 to a text file."""
-    try:
-        categories_data = get_outlast2_categories()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"outlast2_records_{timestamp}.txt"
-        file_path = os.path.join(EXPORT_DIR, filename)
-
-        valid_categories = {k: v for k, v in categories_data.items() if v is not None and v.get("raw_time", 0) > 1}
-
-        with open(file_path, 'w') as f:
-            f.write(f"As of: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ")
-            f.write(f"from: https://www.speedrun.com/outlast2 | ")
+def save_records_to_txt():
+    """Save all Outlast world records to a text file."""
+    return save_game_records_to_txt("outlast")
+
+def export_game_if_changed(game_key, force=False):
+    """
+    Write a game's export file only if its records changed since the last export
+
+    Args:
+        game_key (str): The game key from the registry
+        force (bool): Write the file even if nothing changed
+
+    Returns:
+        dict: game, changed, changes (per-category reasons) and file_path,
+        which is None if the export was skipped or failed; pass it to
+        mark_exported once the export has been delivered
+    """
+    game = get_game(game_key)
+    started = time.monotonic()
+    categories_data = export_records_data(game_key)
+    last_export = record_store.export_fingerprint(game_key)
+    previous_fingerprint, previous = last_export if last_export else (None, None)
+
+    normalized = normalize_records(categories_data, previous)
+    current_fingerprint = fingerprint(normalized)
+    export = {
+        "game_key": game_key,
+        "game": game["label"],
+        "changed": current_fingerprint != previous_fingerprint,
+        "changes": diff_records(previous, normalized),
+        "fingerprint": current_fingerprint,
+        "normalized": normalized,
+        "file_path": None
+    }
+
+    if not export["changed"] and not force:
+        logger.info(f"{game['label']} records unchanged since last export, skipping")
+    else:
+        for change in export["changes"]:
+            logger.info(f"{game['label']} {change['category']} changed: {', '.join(change['reasons'])}")
+        export["file_path"] = save_game_records_to_txt(game_key, categories_data)
+    export["duration"] = round(time.monotonic() - started, 3)
+    return export
+
+def export_all_games(force=False):
+    """
+    Run export_game_if_changed for every registered game in parallel
+
+    Games run on a pool of EXPORT_MAX_WORKERS threads. A game that has not
+    finished EXPORT_GAME_TIMEOUT seconds after the batch started is reported
+    as failed and left out of the push; it cannot be interrupted, so it
+    finishes in the background and its result is discarded.
+
+    Args:
+        force (bool): Write every file even if nothing changed
+
+    Returns:
+        tuple: (finished export results, failures as {"game", "success",
+        "error"} dicts), each in registry order
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, min(EXPORT_MAX_WORKERS, len(GAMES))))
+    started = time.monotonic()
+    futures = {game_key: executor.submit(export_game_if_changed, game_key, force) for game_key in GAMES}
+    executor.shutdown(wait=False)
+
+    exports, failures = [], []
+    for game_key, future in futures.items():
+        game = GAMES[game_key]
+        try:
+            exports.append(future.result(timeout=max(0.0, started + EXPORT_GAME_TIMEOUT - time.monotonic())))
+        except FuturesTimeout:
+            future.cancel()
+            logger.error(f"{game['label']} export timed out after {EXPORT_GAME_TIMEOUT:g}s")
+            failures.append({"game": game["label"], "success": False,
+                             "error": f"Timed out after {EXPORT_GAME_TIMEOUT:g}s"})
+        except Exception as e:
+            logger.error(f"Error exporting {game['label']} records: {str(e)}")
+            failures.append({"game": game["label"], "success": False, "error": str(e)})
+    return exports, failures
 
-            for record in valid_categories.values():
-                f.write(f"{record['category']} ")
-                f.write(f": {record['detailed_time']} ")
-                f.write(f"by: {record['runner']} ")
-                f.write(" | ")
+def mark_exported(export):
+    """Remember what a delivered export contained so unchanged records are skipped next time."""
+    record_store.save_export_fingerprint(export["game_key"], export["fingerprint"], export["normalized"])
 
-        app.config['LATEST_OUTLAST2_EXPORT'] = file_path
-        logger.info(f"Outlast 2 export completed: {file_path}")
-        return file_path
-    except Exception as e:
-        logger.error(f"Error in Outlast 2 export: {str(e)}")
-        return None
+def export_summary(export):
+    """The JSON-safe part of an export_game_if_changed result."""
+    return {"game": export["game"], "changed": export["changed"], "changes": export["changes"],
+            "duration": export["duration"]}
 
 # GitHub Integration
 def push_to_github(file_path, github_path):
@@ -171,7 +409,7 @@ def push_to_github(file_path, github_path):
         }
 
         url = f"{GITHUB_API_URL}/repos/{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/contents/{github_path}"
-        response = requests.get(url, headers=headers)
+        response = upstream.github_request("GET", url, headers=headers)
 
         if response.status_code == 200:
             file_sha = response.json()['sha']
@@ -186,7 +424,7 @@ def push_to_github(file_path, github_path):
                 'content': base64.b64encode(content.encode()).decode()
             }
 
-        response = requests.put(url, json=data, headers=headers)
+        response = upstream.github_request("PUT", url, json=data, headers=headers)
 
         if response.status_code in (200, 201):
             logger.info(f"Successfully pushed {file_path} to GitHub")
@@ -199,6 +437,158 @@ def push_to_github(file_path, github_path):
         logger.error(f"Error pushing to GitHub: {str(e)}")
         return False
 
+# Branch tip last read from GitHub, reused while the ref's ETag still matches
+_github_head = {"etag": None, "commit_sha": None, "tree_sha": None, "branch": None}
+_github_head_lock = threading.Lock()
+
+def github_headers():
+    """Headers for authenticated GitHub API requests."""
+    return {
+        'Authorization': f'token {GITHUB_TOKEN}',
+        'Accept': 'application/vnd.github.v3+json'
+    }
+
+def github_branch():
+    """Return the branch exports are committed to, asking GitHub for the default branch once."""
+    with _github_head_lock:
+        if _github_head["branch"]:
+            return _github_head["branch"]
+    branch = GITHUB_BRANCH
+    if not branch:
+        url = f"{GITHUB_API_URL}/repos/{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}"
+        response = upstream.github_request("GET", url, headers=github_headers())
+        response.raise_for_status()
+        branch = response.json()["default_branch"]
+    with _github_head_lock:
+        _github_head["branch"] = branch
+    return branch
+
+def github_head(branch, use_cache=True):
+    """
+    Get the commit and tree SHA at the tip of a branch
+
+    Uses a conditional request, so an unchanged branch answers 304 and
+    the commit does not have to be looked up again.
+
+    Returns:
+        tuple: (commit SHA, tree SHA)
+    """
+    repo_url = f"{GITHUB_API_URL}/repos/{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}"
+    headers = github_headers()
+    with _github_head_lock:
+        cached = dict(_github_head)
+    if use_cache and cached["etag"]:
+        headers['If-None-Match'] = cached["etag"]
+
+    response = upstream.github_request("GET", f"{repo_url}/git/ref/heads/{branch}", headers=headers)
+    if response.status_code == 304:
+        return cached["commit_sha"], cached["tree_sha"]
+    response.raise_for_status()
+    etag = response.headers.get("ETag")
+    commit_sha = response.json()["object"]["sha"]
+
+    if commit_sha == cached["commit_sha"] and cached["tree_sha"]:
+        # Still the commit we pushed or looked up last time
+        tree_sha = cached["tree_sha"]
+    else:
+        response = upstream.github_request("GET", f"{repo_url}/git/commits/{commit_sha}", headers=github_headers())
+        response.raise_for_status()
+        tree_sha = response.json()["tree"]["sha"]
+
+    with _github_head_lock:
+        _github_head.update(etag=etag, commit_sha=commit_sha, tree_sha=tree_sha)
+    return commit_sha, tree_sha
+
+def push_files_to_github(files, message):
+    """
+    Push several files to GitHub as a single commit using the Git Data API
+
+    Builds one tree holding every file and one commit on top of the branch
+    tip, then fast-forwards the branch. If the branch moved in the
+    meantime, the commit is rebuilt on the new tip.
+
+    Args:
+        files (dict): Repository path to local file path
+        message (str): Commit message
+
+    Returns:
+        bool: True if the commit landed on the branch
+    """
+    if not GITHUB_TOKEN:
+        logger.error("GitHub token not found. Cannot push to GitHub.")
+        return False
+    if not files:
+        return True
+
+    repo_url = f"{GITHUB_API_URL}/repos/{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}"
+    try:
+        tree_entries = []
+        for github_path, file_path in files.items():
+            with open(file_path, 'r') as f:
+                tree_entries.append({"path": github_path, "mode": "100644", "type": "blob", "content": f.read()})
+
+        branch = github_branch()
+        use_cache = True
+        for attempt in range(GITHUB_PUSH_RETRIES + 1):
+            parent_sha, base_tree = github_head(branch, use_cache)
+
+            response = upstream.github_request("POST", f"{repo_url}/git/trees", headers=github_headers(),
+                                               json={"base_tree": base_tree, "tree": tree_entries})
+            response.raise_for_status()
+            tree_sha = response.json()["sha"]
+
+            response = upstream.github_request("POST", f"{repo_url}/git/commits", headers=github_headers(),
+                                               json={"message": message, "tree": tree_sha, "parents": [parent_sha]})
+            response.raise_for_status()
+            commit_sha = response.json()["sha"]
+
+            response = upstream.github_request("PATCH", f"{repo_url}/git/refs/heads/{branch}", headers=github_headers(),
+                                               json={"sha": commit_sha, "force": False})
+            if response.status_code == 200:
+                with _github_head_lock:
+                    _github_head.update(etag=None, commit_sha=commit_sha, tree_sha=tree_sha)
+                logger.info(f"Pushed {len(files)} files to GitHub in commit {commit_sha[:7]}")
+                return True
+            if response.status_code not in (409, 422):
+                logger.error(f"Failed to update GitHub branch. Status: {response.status_code}. Response: {response.text}")
+                return False
+
+            # Someone else moved the branch; rebuild on the new tip
+            logger.warning(f"GitHub branch {branch} moved during push, retrying (attempt {attempt + 2})")
+            use_cache = False
+
+        logger.error(f"Gave up pushing to GitHub after {GITHUB_PUSH_RETRIES + 1} conflicting attempts")
+        return False
+
+    except Exception as e:
+        logger.error(f"Error pushing to GitHub: {str(e)}")
+        return False
+
+def push_exports_to_github(exports):
+    """
+    Push the files of several export_game_if_changed results in one commit
+
+    Marks each export as delivered if the commit landed.
+
+    Returns:
+        bool: True if the commit landed, or there was nothing to push
+    """
+    exports = [export for export in exports if export["file_path"]]
+    if not exports:
+        return True
+
+    lines = [f'Update speedrun records {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', ""]
+    for export in exports:
+        for change in export["changes"]:
+            lines.append(f"- {export['game']} {change['category']}: {', '.join(change['reasons'])}")
+
+    files = {get_game(export["game_key"])["github_filename"]: export["file_path"] for export in exports}
+    success = push_files_to_github(files, "\n".join(lines).strip())
+    if success:
+        for export in exports:
+            mark_exported(export)
+    return success
+
 # Auto-Export Functions
 def auto_export_records():
     """Automatically export records at regular intervals."""
@@ -206,30 +596,19 @@ def auto_export_records():
     while True:
         try:
             logger.info("Auto-export cycle beginning")
-            txt_path = save_records_to_txt()
-
-            if GITHUB_TOKEN and txt_path:
-                try:
-                    push_to_github(txt_path, GITHUB_FILENAME)
-                    logger.info(f"Auto-pushed Outlast records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{GITHUB_FILENAME}")
-                except Exception as github_error:
-                    logger.error(f"Error pushing Outlast records to GitHub during auto-export: {str(github_error)}")
-
-            try:
-                whistleblower_path = save_whistleblower_records_to_txt()
-                if GITHUB_TOKEN and whistleblower_path:
-                    push_to_github(whistleblower_path, WHISTLEBLOWER_FILENAME)
-                    logger.info(f"Auto-pushed Whistleblower records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{WHISTLEBLOWER_FILENAME}")
-            except Exception as whistleblower_error:
-                logger.error(f"Error exporting/pushing Whistleblower records: {str(whistleblower_error)}")
-
-            try:
-                outlast2_path = save_outlast2_records_to_txt()
-                if GITHUB_TOKEN and outlast2_path:
-                    push_to_github(outlast2_path, OUTLAST2_FILENAME)
-                    logger.info(f"Auto-pushed Outlast 2 records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{OUTLAST2_FILENAME}")
-            except Exception as outlast2_error:
-                logger.error(f"Error exporting/pushing Outlast 2 records: {str(outlast2_error)}")
+
+            exports, _ = export_all_games()
+
+            if GITHUB_TOKEN:
+                # Every changed game goes out in a single commit
+                if push_exports_to_github(exports):
+                    pushed = [export["game"] for export in exports if export["file_path"]]
+                    if pushed:
+                        logger.info(f"Auto-pushed {', '.join(pushed)} records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}")
+            else:
+                for export in exports:
+                    if export["file_path"]:
+                        mark_exported(export)
 
             cleanup_old_exports()
             time.sleep(21600)
@@ -290,7 +669,10 @@ def list_exports():
 def export_records():
     """Export all world records to a text file and provide download link."""
     try:
-        categories_data = get_all_categories()
+        # Build the file from the snapshot rather than fetching every category inline
+        categories_data, _, _ = record_snapshot.get(OUTLAST_GAME_KEY)
+        if categories_data is None:
+            return render_template("error.html", error="Records are not available yet, try again shortly"), 503
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"outlast_world_records_{timestamp}.txt"
         file_path = os.path.join(EXPORT_DIR, filename)
@@ -311,7 +693,7 @@ def export_records():
                 f.write(f"Date: {record['date']}\n")
                 f.write("\n")
 
-        app.config['LATEST_EXPORT'] = file_path
+        record_store.set_latest_export("outlast", file_path)
         return send_file(file_path, as_attachment=True)
 
     except Exception as e:
@@ -324,11 +706,13 @@ def export_records():
 def get_latest_records():
     """Return the latest exported records file if available."""
     try:
-        file_path = app.config.get('LATEST_EXPORT')
-        if file_path and os.path.exists(file_path):
-            return send_file(file_path, as_attachment=True)
-        else:
-            return export_records()
+        file_path = record_store.latest_export("outlast")
+        if not (file_path and os.path.exists(file_path)):
+            response = export_records()
+            file_path = record_store.latest_export("outlast")
+            if not (file_path and os.path.exists(file_path)):
+                return response
+        return cacheable_file(file_path)
     except Exception as e:
         logger.error(f"Error retrieving latest export: {str(e)}")
         return render_template("error.html", error="Failed to retrieve latest export"), 500
@@ -346,136 +730,178 @@ def download_export(filename):
         logger.error(f"Error downloading export: {str(e)}")
         return render_template("error.html", error="Failed to download export"), 500
 
+# Export Jobs
+def run_export_now():
+    """Job: write an export file for every registered game."""
+    export_paths = {game_key: save_game_records_to_txt(game_key) for game_key in GAMES}
+    failed = [GAMES[game_key]["label"] for game_key, path in export_paths.items() if not path]
+    if failed:
+        raise Exception(f"Failed to generate exports for {', '.join(failed)}")
+    return {"files": export_paths}
+
+def run_game_push(game_key):
+    """Job: export a registered game's current records and push them to GitHub."""
+    game = get_game(game_key)
+    # A manual push always goes out, changed or not
+    export = export_game_if_changed(game_key, force=True)
+    txt_path = export["file_path"]
+    if not txt_path:
+        raise Exception(f"Failed to generate {game['label']} export file")
+
+    if not push_to_github(txt_path, game["github_filename"]):
+        raise Exception(f"Failed to push {game['label']} records to GitHub. Check server logs for details.")
+    mark_exported(export)
+    return dict(export_summary(export), file_path=txt_path,
+                github_path=f"{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{game['github_filename']}")
+
+def run_cron_export(force=False):
+    """Job: export every changed game and push them to GitHub in one commit."""
+    results = {"success": False, "results": []}
+
+    exports, failures = export_all_games(force=force)
+    results["results"].extend(failures)
+
+    # Every changed game goes out in a single commit
+    pushed = push_exports_to_github(exports) if GITHUB_TOKEN else None
+    for export in exports:
+        if not export["changed"] and not force:
+            results["results"].append(dict(export_summary(export), success=True, skipped=True))
+        elif not export["file_path"]:
+            results["results"].append(dict(export_summary(export), success=False,
+                                           error="Failed to generate export file"))
+        elif GITHUB_TOKEN:
+            results["results"].append(dict(export_summary(export), success=pushed))
+            logger.info(f"Cron job: Pushed {export['game']} records to GitHub: {pushed}")
+        else:
+            mark_exported(export)
+
+    cleanup_old_exports()
+
+    failed = [result for result in results["results"] if not result["success"]]
+    results["success"] = not failed and pushed is not False
+    if not results["success"]:
+        # Raise so the job is marked failed, naming every game that did not go out
+        errors = [f"{result['game']}: {result.get('error', 'GitHub push failed')}" for result in failed]
+        raise Exception("Cron export failed: " + ("; ".join(errors) or "GitHub push failed"))
+    return results
+
+def run_resync(game_keys):
+    """Job: fully re-fetch the records of the given games, bypassing the delta sync."""
+    results = {}
+    for game_key in game_keys:
+        records_after = record_snapshot.resync(game_key)
+        results[game_key] = {"categories": len(records_after or {})}
+    return results
+
+def queued_flash(job, created, description):
+    """Tell the user an export job was queued, or that an identical one is already active."""
+    if created:
+        flash(f"{description} queued as job {job['job_id']}. Check /api/jobs/{job['job_id']} for progress.", "info")
+    else:
+        flash(f"{description} is already {job['status']} as job {job['job_id']}.", "info")
+
+def job_accepted(job, created):
+    """Build the 202 response returned when a job is enqueued or deduplicated."""
+    response = jsonify({
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "deduplicated": not created,
+        "status_url": url_for('job_status_api', job_id=job["job_id"])
+    })
+    response.status_code = 202
+    response.headers["Location"] = url_for('job_status_api', job_id=job["job_id"])
+    return response
+
 @app.route("/export/now")
 def trigger_export():
-    """Trigger an immediate export of the records."""
+    """Queue an immediate export of the records."""
     try:
-        txt_path = save_records_to_txt()
-        whistleblower_path = save_whistleblower_records_to_txt()
-        outlast2_path = save_outlast2_records_to_txt()
-
-        if txt_path and whistleblower_path and outlast2_path:
-            return redirect(url_for('list_exports'))
-        else:
-            flash("Failed to generate some exports", "danger")
-            return redirect(url_for('list_exports'))
+        job, created = job_queue.submit("export-now", run_export_now)
+        queued_flash(job, created, "Export of every game")
     except Exception as e:
         logger.error(f"Error triggering export: {str(e)}")
-        flash("Error occurred while exporting", "danger")
-        return redirect(url_for('list_exports'))
-
-@app.route("/export/to-github")
-def export_to_github():
-    """Export the current records to GitHub."""
+        flash("Error occurred while queuing the export", "danger")
+    return redirect(url_for('list_exports'))
+
+@app.route("/export/to-github", defaults={"game_key": "outlast"})
+@app.route("/export/<game_key>/to-github")
+def export_to_github(game_key):
+    """Queue an export of the current records of a registered game to GitHub."""
+    game = get_game(game_key)
+    if game is None:
+        return render_template("error.html", error="Game not found"), 404
     try:
-        txt_path = save_records_to_txt()
-
-        if not txt_path:
-            flash("Failed to generate export file", "danger")
-            return redirect(url_for('list_exports'))
-
-        success = push_to_github(txt_path, GITHUB_FILENAME)
-
-        if success:
-            flash(f"Successfully pushed records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{GITHUB_FILENAME}", "success")
-        else:
-            flash("Failed to push to GitHub. Check server logs for details.", "danger")
-
-        return redirect(url_for('list_exports'))
+        job, created = job_queue.submit(f"push:{game_key}", run_game_push, game_key)
+        queued_flash(job, created, f"GitHub push of {game['label']} records")
     except Exception as e:
-        logger.error(f"Error exporting to GitHub: {str(e)}")
-        flash(f"Error exporting to GitHub: {str(e)}", "danger")
-        return redirect(url_for('list_exports'))
+        logger.error(f"Error queuing {game['label']} GitHub export: {str(e)}")
+        flash(f"Error queuing {game['label']} export to GitHub: {str(e)}", "danger")
+    return redirect(url_for('list_exports'))
 
-@app.route("/export/whistleblower/to-github")
-def export_whistleblower_to_github():
-    """Export the Outlast: Whistleblower records to GitHub."""
+@app.route("/api/cron/export-to-github", methods=["GET", "POST"])
+def cron_export_to_github():
+    """Special endpoint for Render Cron Jobs to queue GitHub exports; ?force=1 pushes unchanged records too."""
+    force = request.args.get("force", "").lower() in ("1", "true", "yes")
     try:
-        txt_path = save_whistleblower_records_to_txt()
-
-        if not txt_path:
-            flash("Failed to generate Whistleblower export file", "danger")
-            return redirect(url_for('list_exports'))
-
-        success = push_to_github(txt_path, WHISTLEBLOWER_FILENAME)
-
-        if success:
-            flash(f"Successfully pushed Whistleblower records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{WHISTLEBLOWER_FILENAME}", "success")
-        else:
-            flash("Failed to push Whistleblower records to GitHub. Check server logs for details.", "danger")
-
-        return redirect(url_for('list_exports'))
+        job, created = job_queue.submit("cron-export" + (":force" if force else ""), run_cron_export, force)
+        return job_accepted(job, created)
     except Exception as e:
-        logger.error(f"Error exporting Whistleblower to GitHub: {str(e)}")
-        flash(f"Error exporting Whistleblower to GitHub: {str(e)}", "danger")
-        return redirect(url_for('list_exports'))
+        logger.error(f"Cron job: Error queuing GitHub export: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route("/export/outlast2/to-github")
-def export_outlast2_to_github():
-    """Export the Outlast 2 records to GitHub."""
+@app.route("/api/sync/resync", methods=["GET", "POST"])
+def resync_records_api():
+    """API endpoint to queue a full resync of every game's records, or of ?game= only."""
+    game_key = request.args.get("game")
+    if game_key is not None and get_game(game_key) is None:
+        return jsonify({"error": "Game not found"}), 404
+    game_keys = [game_key] if game_key else list(GAMES)
     try:
-        txt_path = save_outlast2_records_to_txt()
-
-        if not txt_path:
-            flash("Failed to generate Outlast 2 export file", "danger")
-            return redirect(url_for('list_exports'))
-
-        success = push_to_github(txt_path, OUTLAST2_FILENAME)
-
-        if success:
-            flash(f"Successfully pushed Outlast 2 records to GitHub: {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}/{OUTLAST2_FILENAME}", "success")
-        else:
-            flash("Failed to push Outlast 2 records to GitHub. Check server logs for details.", "danger")
-
-        return redirect(url_for('list_exports'))
+        job, created = job_queue.submit(f"resync:{game_key or 'all'}", run_resync, game_keys)
+        return job_accepted(job, created)
     except Exception as e:
-        logger.error(f"Error exporting Outlast 2 to GitHub: {str(e)}")
-        flash(f"Error exporting Outlast 2 to GitHub: {str(e)}", "danger")
-        return redirect(url_for('list_exports'))
+        logger.error(f"Error queuing resync: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route("/api/cron/export-to-github", methods=["GET", "POST"])
-def cron_export_to_github():
-    """Special endpoint for Render Cron Jobs to trigger GitHub exports."""
+@app.route("/api/discovery")
+def discovery_api():
+    """API endpoint reporting discovered categories per game, detected changes and out-of-date games.json entries."""
+    return jsonify(discovery_cache.status())
+
+@app.route("/api/discovery/<game_key>")
+def game_discovery_api(game_key):
+    """API endpoint listing every discovered category and variable of a registered game."""
+    game = get_game(game_key)
+    if game is None:
+        return jsonify({"error": "Game not found"}), 404
+    categories = discovery_cache.categories(game["game_id"])
+    if categories is None:
+        return jsonify({"error": "Game not discovered yet"}), 404
+    return jsonify({"game": game_key, "game_id": game["game_id"], "categories": categories})
+
+@app.route("/api/discovery/refresh", methods=["GET", "POST"])
+def discovery_refresh_api():
+    """API endpoint to queue a refresh of every game's discovered categories."""
     try:
-        results = {"success": True, "results": []}
-
-        try:
-            txt_path = save_records_to_txt()
-            if txt_path and GITHUB_TOKEN:
-                success = push_to_github(txt_path, GITHUB_FILENAME)
-                results["results"].append({"game": "Outlast", "success": success})
-                logger.info(f"Cron job: Pushed Outlast records to GitHub: {success}")
-        except Exception as e:
-            logger.error(f"Cron job: Error exporting Outlast to GitHub: {str(e)}")
-            results["results"].append({"game": "Outlast", "success": False, "error": str(e)})
-
-        try:
-            whistleblower_path = save_whistleblower_records_to_txt()
-            if whistleblower_path and GITHUB_TOKEN:
-                success = push_to_github(whistleblower_path, WHISTLEBLOWER_FILENAME)
-                results["results"].append({"game": "Whistleblower", "success": success})
-                logger.info(f"Cron job: Pushed Whistleblower records to GitHub: {success}")
-        except Exception as e:
-            logger.error(f"Cron job: Error exporting Whistleblower to GitHub: {str(e)}")
-            results["results"].append({"game": "Whistleblower", "success": False, "error": str(e)})
-
-        try:
-            outlast2_path = save_outlast2_records_to_txt()
-            if outlast2_path and GITHUB_TOKEN:
-                success = push_to_github(outlast2_path, OUTLAST2_FILENAME)
-                results["results"].append({"game": "Outlast 2", "success": success})
-                logger.info(f"Cron job: Pushed Outlast 2 records to GitHub: {success}")
-        except Exception as e:
-            logger.error(f"Cron job: Error exporting Outlast 2 to GitHub: {str(e)}")
-            results["results"].append({"game": "Outlast 2", "success": False, "error": str(e)})
-
-        cleanup_old_exports()
-        return jsonify(results)
-
+        job, created = job_queue.submit("discovery-refresh", discovery_cache.refresh_due, True)
+        return job_accepted(job, created)
     except Exception as e:
-        logger.error(f"Cron job: Error in GitHub export endpoint: {str(e)}")
+        logger.error(f"Error queuing discovery refresh: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route("/api/jobs")
+def jobs_api():
+    """API endpoint listing the most recent export jobs."""
+    return jsonify(job_queue.recent())
+
+@app.route("/api/jobs/<job_id>")
+def job_status_api(job_id):
+    """API endpoint reporting the status and result of an export job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 # Error Handlers
 @app.errorhandler(404)
 def page_not_found(e):
@@ -0,0 +1,283 @@
+"""
+Async ASGI entry point for the Outlast record API.
+
+Serves /api/outlastwr, /api/outlast/category/<key> and /api/outlast/categories
+with non-blocking speedrun.com requests on one shared httpx connection pool,
+so a single process can hold hundreds of slow requests open at once.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+import os
+import re
+import json
+import asyncio
+import logging
+
+import httpx
+
+import records
+import upstream
+from games import get_game
+from record_cache import record_cache
+from runner_cache import remember_embedded_players
+from http_cache import content_etag, cache_control, API_CACHE_MAX_AGE, API_CACHE_STALE_WHILE_REVALIDATE
+from speedrun_api import OUTLAST_GAME_KEY
+from transport import UPSTREAM_MODE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Connections kept open to speedrun.com by the async client
+ASYNC_POOL_SIZE = int(os.environ.get("ASYNC_POOL_SIZE", "20"))
+
+
+class AsyncUpstream:
+    """
+    Async counterpart of upstream.get.
+
+    Shares the process-wide token bucket, retry policy and counters with the
+    threaded code, but waits with asyncio instead of blocking a thread.
+    """
+
+    def __init__(self, pool_size=ASYNC_POOL_SIZE):
+        self.pool_size = pool_size
+        self.client = None
+
+    async def start(self):
+        """Open the shared connection pool."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(upstream.HTTP_READ_TIMEOUT, connect=upstream.HTTP_CONNECT_TIMEOUT))
+
+    async def close(self):
+        """Close the shared connection pool."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, url):
+        """
+        Issue a rate-limited GET request to speedrun.com, retrying on throttling
+
+        Replay and record modes go through the threaded transport so fixtures
+        work the same way as under gunicorn.
+
+        Args:
+            url (str): Request URL
+
+        Returns:
+            httpx.Response or requests.Response: The final response
+
+        Raises:
+            upstream.RateLimitError: If every attempt was throttled
+            httpx.TransportError: If every attempt failed to connect
+        """
+        if UPSTREAM_MODE != "live":
+            return await asyncio.to_thread(upstream.get, url)
+
+        await self.start()
+        for attempt in range(upstream.SPEEDRUN_MAX_RETRIES + 1):
+            throttle_wait = upstream.bucket.reserve()
+            if throttle_wait > 0:
+                await asyncio.sleep(throttle_wait)
+            upstream.stats.add(requests=1, throttle_wait=throttle_wait)
+            response = None
+            try:
+                response = await self.client.get(url)
+            except httpx.TransportError as e:
+                if attempt == upstream.SPEEDRUN_MAX_RETRIES:
+                    raise
+                logger.warning(f"Connection error from {url}: {str(e)}")
+            else:
+                if response.status_code not in upstream.RETRY_STATUSES:
+                    return response
+                if response.status_code in upstream.RATE_LIMIT_STATUSES:
+                    upstream.stats.add(rate_limited=1)
+                if attempt == upstream.SPEEDRUN_MAX_RETRIES:
+                    if response.status_code in upstream.RATE_LIMIT_STATUSES:
+                        raise upstream.RateLimitError(f"Rate limited by speedrun.com after {attempt + 1} attempts")
+                    return response
+                logger.warning(f"HTTP {response.status_code} from {url}")
+
+            delay = upstream._retry_delay(response, attempt)
+            logger.debug(f"Retrying {url} in {delay:.2f}s (attempt {attempt + 2})")
+            upstream.stats.add(retries=1, backoff_wait=delay)
+            await asyncio.sleep(delay)
+
+
+async_upstream = AsyncUpstream()
+
+# Loads currently running, so concurrent misses share one upstream request
+_in_flight = {}
+
+
+async def _load_category_record(game, game_key, category_key):
+    """Fetch one category's leaderboard and build its record."""
+    api_url = records.leaderboard_url(game, game["categories"][category_key])
+    try:
+        logger.debug(f"Fetching data from: {api_url}")
+        response = await async_upstream.get(api_url)
+        if response.status_code >= 400:
+            raise Exception(f"HTTP {response.status_code} from {api_url}")
+        leaderboard = response.json()["data"]
+    except (KeyError, IndexError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+    except Exception as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+
+    # Storing and looking up runner names blocks, so keep it off the event loop
+    await asyncio.to_thread(remember_embedded_players, leaderboard.get("players", {}).get("data"))
+    return await asyncio.to_thread(records.build_record, game, category_key, leaderboard)
+
+
+async def get_category_record(game_key, category_key):
+    """
+    Get the world record for a category, sharing the threaded record cache
+
+    Args:
+        game_key (str): The game key from the registry
+        category_key (str): The category key within the game
+
+    Returns:
+        dict: The record data or None if the game or category is not found
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    game = get_game(game_key)
+    if game is None or category_key not in game["categories"]:
+        return None
+
+    key = ("records", game_key, category_key)
+    record = record_cache.get(key)
+    if record is not None:
+        return record
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_category_record(game, game_key, category_key))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    record = await asyncio.shield(task)
+    record_cache.set(key, record)
+    return record
+
+
+async def get_all_categories(game_key):
+    """
+    Fetch world records for every category of a game concurrently
+
+    Returns:
+        dict: Category keys to record data; failed categories map to None
+    """
+    game = get_game(game_key)
+    if game is None:
+        return {}
+
+    category_keys = list(game["categories"])
+    results = await asyncio.gather(
+        *(get_category_record(game_key, category_key) for category_key in category_keys),
+        return_exceptions=True)
+
+    all_records = {}
+    for category_key, result in zip(category_keys, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error fetching {game_key}/{category_key} category: {str(result)}")
+            result = None
+        all_records[category_key] = result
+    return all_records
+
+
+async def outlast_wr_api(scope):
+    """API endpoint to get the Outlast Any% world record time."""
+    return await category_record_api(scope, "any%")
+
+
+async def category_record_api(scope, category_key):
+    """API endpoint to get the world record for a specific category."""
+    game = get_game(OUTLAST_GAME_KEY)
+    if category_key not in game["categories"]:
+        return 404, {"error": "Category not found"}
+    try:
+        return 200, await get_category_record(OUTLAST_GAME_KEY, category_key)
+    except Exception as e:
+        logger.error(f"Error in category API for {category_key}: {str(e)}")
+        return 503, {"error": "Failed to fetch category record"}
+
+
+async def all_categories_api(scope):
+    """API endpoint to get world records for all categories."""
+    all_records = await get_all_categories(OUTLAST_GAME_KEY)
+    if all(record is None for record in all_records.values()):
+        return 503, {"error": "Failed to fetch category records"}
+    return 200, all_records
+
+
+# (path pattern, handler) pairs, matched in order
+ROUTES = [
+    (re.compile(r"^/api/outlastwr$"), outlast_wr_api),
+    (re.compile(r"^/api/outlast/category/(?P<category_key>[^/]+)$"), category_record_api),
+    (re.compile(r"^/api/outlast/categories$"), all_categories_api),
+]
+
+
+async def send_json(send, scope, status, payload):
+    """Send a JSON response with the same caching headers as the Flask routes."""
+    body = json.dumps(payload).encode()
+    headers = [(b"content-type", b"application/json")]
+    if status == 200:
+        etag = f'"{content_etag(payload)}"'
+        headers += [
+            (b"etag", etag.encode()),
+            (b"cache-control", cache_control(API_CACHE_MAX_AGE, API_CACHE_STALE_WHILE_REVALIDATE).encode())
+        ]
+        request_headers = dict(scope.get("headers", []))
+        if_none_match = request_headers.get(b"if-none-match", b"").decode()
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            status, body = 304, b""
+    if scope["method"] == "HEAD":
+        body = b""
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def lifespan(receive, send):
+    """Open the upstream pool at startup and close it at shutdown."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await async_upstream.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await async_upstream.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    for pattern, handler in ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            break
+    else:
+        await send_json(send, scope, 404, {"error": "Not found"})
+        return
+
+    if scope["method"] not in ("GET", "HEAD"):
+        await send_json(send, scope, 405, {"error": "Method not allowed"})
+        return
+
+    status, payload = await handler(scope, **match.groupdict())
+    await send_json(send, scope, status, payload)
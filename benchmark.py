@@ -0,0 +1,387 @@
+"""
+Benchmark harness for the record-fetch and export pipelines.
+
+Runs every pipeline against local stand-ins for speedrun.com and GitHub
+with configurable injected latency. It reports wall time, upstream call
+counts, allocations and throughput as JSON.
+
+Usage:
+    python benchmark.py [--latency 0.05] [--iterations 5] [--output bench.json]
+                        [--compare baseline.json] [--warm] [--rate-limit]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import statistics
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+
+import logging
+
+# Keep benchmark runs away from the real runner cache and record store
+os.environ.setdefault("RUNNER_CACHE_PATH", "")
+os.environ.setdefault("DISCOVERY_CACHE_PATH", "")
+os.environ.setdefault("SNAPSHOT_PATH", "")
+os.environ.setdefault("RECORD_STORE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='speedrun-bench-')}/store.db")
+
+import upstream
+from transport import make_response
+import app as webapp
+import records
+import delta_sync
+from games import GAMES
+from record_cache import record_cache
+from snapshot import record_snapshot
+
+# app configures DEBUG logging on import; quieten it for benchmark output
+logging.getLogger().setLevel(os.environ.get("BENCHMARK_LOG_LEVEL", "WARNING"))
+
+
+class StubSpeedrun:
+    """
+    Stand-in for speedrun.com that synthesises leaderboard and user payloads.
+
+    Every response is delayed by latency seconds and counted per endpoint.
+    """
+
+    def __init__(self, latency, paced=False):
+        self.latency = latency
+        self.paced = paced
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        """Answer a speedrun.com API request."""
+        path = urlsplit(url).path
+        kind = path.split("/")[3] if path.count("/") >= 3 else path
+        with self._lock:
+            self.calls[kind] += 1
+        time.sleep(self.latency)
+
+        if kind == "users":
+            runner_id = path.rsplit("/", 1)[-1]
+            return make_response(url, 200, {"data": {"id": runner_id, "names": {"international": f"runner-{runner_id}"}}})
+
+        if kind == "games" and path.endswith("/categories"):
+            game_id = path.split("/")[4]
+            categories = {}
+            for game in GAMES.values():
+                if game["game_id"] != game_id:
+                    continue
+                for category in game["categories"].values():
+                    entry = categories.setdefault(category["id"], {
+                        "id": category["id"], "name": category["name"], "type": "per-game",
+                        "miscellaneous": False, "variables": {"data": []}})
+                    for variable in category["main_game_variable"]:
+                        variables = {v["id"]: v for v in entry["variables"]["data"]}
+                        stub = variables.get(variable["id"])
+                        if stub is None:
+                            stub = {"id": variable["id"], "name": variable.get("note", variable["id"]),
+                                    "is-subcategory": True, "values": {"values": {}, "default": variable["value"]}}
+                            entry["variables"]["data"].append(stub)
+                        stub["values"]["values"][variable["value"]] = {"label": variable.get("note", variable["value"])}
+            return make_response(url, 200, {"data": list(categories.values())})
+
+        if kind == "games":
+            game_id = path.split("/")[4]
+            category_ids = dict.fromkeys(category["id"] for game in GAMES.values() if game["game_id"] == game_id
+                                         for category in game["categories"].values())
+            leaderboards = [dict(self._leaderboard(category_id, top=None), category=category_id, level=None)
+                            for category_id in category_ids]
+            return make_response(url, 200, {"data": leaderboards, "pagination": {"links": []}})
+
+        query = parse_qs(urlsplit(url).query)
+        if kind == "runs":
+            # Every synthesised run, as if all were verified at the same time
+            game_id = query["game"][0]
+            category_ids = dict.fromkeys(category["id"] for game in GAMES.values() if game["game_id"] == game_id
+                                         for category in game["categories"].values())
+            runs = [dict(entry["run"], category=category_id, level=None, players=self.PLAYERS,
+                         status={"status": "verified", "verify-date": "2024-11-02T12:00:00Z"})
+                    for category_id in category_ids for entry in self._leaderboard(category_id, top=None)["runs"]]
+            return make_response(url, 200, {"data": runs[:int(query["max"][0])], "pagination": {"links": []}})
+
+        filters = {key[len("var-"):]: values[0] for key, values in query.items() if key.startswith("var-")}
+        top = int(query["top"][0]) if "top" in query else None
+        category_id = path.rsplit("/", 1)[-1]
+        leaderboard = dict(self._leaderboard(category_id, top, filters), category=category_id)
+        return make_response(url, 200, {"data": leaderboard})
+
+    PLAYERS = {"data": [{"rel": "user", "id": "8v2olm5j", "names": {"international": "PyBrou"}}]}
+
+    def _leaderboard(self, category_id, top, filters=None):
+        """Synthesise a leaderboard mixing the runs of every registered subcategory of a category."""
+        runs = []
+        for game in GAMES.values():
+            for category in game["categories"].values():
+                values = {variable["id"]: variable["value"] for variable in category["main_game_variable"]}
+                if category["id"] == category_id and values not in (run["values"] for run in runs):
+                    runs.append(self._run(category_id, values))
+        runs = [run for run in runs if all(run["values"].get(key) == value for key, value in (filters or {}).items())]
+        runs.sort(key=lambda run: run["times"]["primary_t"])
+        entries = [{"place": place, "run": run} for place, run in enumerate(runs[:top], start=1)]
+        return {"runs": entries, "players": self.PLAYERS}
+
+    @staticmethod
+    def _run(category_id, values=None):
+        """Synthesise the best run of a subcategory."""
+        values = values or {}
+        key = category_id + "".join(sorted(values.values()))
+        return {
+            "id": f"run-{key}",
+            "times": {"primary_t": 1000 + sum(map(ord, key)) / 7},
+            "players": [{"rel": "user", "id": "8v2olm5j"}],
+            "date": "2024-11-01",
+            "submitted": "2024-11-02T10:00:00Z",
+            "values": values
+        }
+
+
+class StubGitHub:
+    """
+    Stand-in for the GitHub contents and Git Data APIs used for exports.
+
+    Keeps a branch head so conditional ref lookups answer 304 until a push
+    moves it.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = Counter()
+        self.head = "0" * 40
+        self._commits = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        """Answer a GitHub API request."""
+        with self._lock:
+            self.calls[method] += 1
+        time.sleep(self.latency)
+        path = urlsplit(url).path
+        headers = kwargs.get("headers") or {}
+
+        if "/git/ref/heads/" in path:
+            etag = f'"{self.head}"'
+            if headers.get("If-None-Match") == etag:
+                return make_response(url, 304, b"")
+            response = make_response(url, 200, {"object": {"sha": self.head}})
+            response.headers["ETag"] = etag
+            return response
+        if "/git/commits/" in path:
+            return make_response(url, 200, {"tree": {"sha": "2" * 40}})
+        if path.endswith("/git/trees") or path.endswith("/git/commits"):
+            with self._lock:
+                self._commits += 1
+                sha = f"{self._commits:040x}"
+            return make_response(url, 201, {"sha": sha})
+        if "/git/refs/heads/" in path:
+            with self._lock:
+                self.head = kwargs["json"]["sha"]
+            return make_response(url, 200, {"object": {"sha": self.head}})
+        if method == "GET" and "/contents/" not in path:
+            return make_response(url, 200, {"default_branch": "main"})
+        if method == "GET":
+            return make_response(url, 200, {"sha": "0" * 40})
+        return make_response(url, 200, {"content": {"sha": "1" * 40}})
+
+
+def reset_caches():
+    """Forget cached records so each iteration does its full upstream work."""
+    record_cache.clear()
+
+
+def measure(name, func, iterations, speedrun, github, warm, units=1):
+    """
+    Time a pipeline and count the upstream calls it makes
+
+    Args:
+        name (str): Pipeline name used in the report
+        func (callable): Zero-argument function running the pipeline once
+        iterations (int): Number of timed runs
+        speedrun (StubSpeedrun): speedrun.com stand-in
+        github (StubGitHub): GitHub stand-in
+        warm (bool): Keep caches between iterations
+        units (int): Work items per run, e.g. categories, for throughput
+
+    Returns:
+        dict: Measurements for this pipeline
+    """
+    timings = []
+    speedrun.calls.clear()
+    github.calls.clear()
+    for _ in range(iterations):
+        if not warm:
+            reset_caches()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    speedrun_calls = dict(speedrun.calls)
+    github_calls = dict(github.calls)
+
+    # Separate traced run so tracemalloc overhead does not skew the timings
+    if not warm:
+        reset_caches()
+    tracemalloc.start()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(timings)
+    result = {
+        "pipeline": name,
+        "iterations": iterations,
+        "wall_time": {
+            "mean": round(statistics.mean(timings), 4),
+            "median": round(statistics.median(timings), 4),
+            "min": round(min(timings), 4),
+            "max": round(max(timings), 4)
+        },
+        "upstream_calls_per_run": {
+            "speedrun": {k: v / iterations for k, v in speedrun_calls.items()},
+            "github": {k: v / iterations for k, v in github_calls.items()}
+        },
+        "allocations": {
+            "peak_kib": round(peak / 1024, 1),
+            "retained_kib": round(current / 1024, 1)
+        },
+        "throughput": {
+            "runs_per_second": round(iterations / total, 3) if total else None,
+            "units_per_second": round(iterations * units / total, 3) if total else None
+        }
+    }
+    print(f"{name:<40} mean {result['wall_time']['mean']:.4f}s  "
+          f"speedrun calls/run {sum(speedrun_calls.values()) / iterations:.1f}  "
+          f"github calls/run {sum(github_calls.values()) / iterations:.1f}  "
+          f"peak {result['allocations']['peak_kib']} KiB", file=sys.stderr)
+    return result
+
+
+def run_benchmarks(latency, github_latency, iterations, warm, rate_limit):
+    """
+    Run every pipeline against the stand-ins
+
+    Returns:
+        dict: Full benchmark report
+    """
+    speedrun = StubSpeedrun(latency, paced=rate_limit)
+    github = StubGitHub(github_latency)
+    upstream.transport = speedrun
+    upstream.github_session = github
+    webapp.GITHUB_TOKEN = "benchmark"
+    export_dir = tempfile.mkdtemp(prefix="speedrun-bench-")
+    webapp.EXPORT_DIR = export_dir
+    client = webapp.app.test_client()
+
+    # Load the snapshot up front and keep its refresh thread from starting, so
+    # routes that read it are measured without background upstream calls
+    record_snapshot.start = lambda: None
+    for game_key in GAMES:
+        record_snapshot.refresh_game(game_key)
+
+    results = []
+    for game_key, game in GAMES.items():
+        category_count = len(game["categories"])
+        results.append(measure(f"get_all_categories[{game_key}]",
+                               lambda: records.get_all_categories(game_key),
+                               iterations, speedrun, github, warm, category_count))
+        results.append(measure(f"save_records_to_txt[{game_key}]",
+                               lambda: webapp.save_game_records_to_txt(game_key),
+                               iterations, speedrun, github, warm, category_count))
+
+    # Served from the snapshot: no upstream calls
+    results.append(measure("export_records", lambda: client.get("/export/outlast/records").close(),
+                           iterations, speedrun, github, warm))
+    # The cron route only queues a job, so time the job itself
+    results.append(measure("cron_export_to_github", lambda: webapp.run_cron_export(force=True),
+                           iterations, speedrun, github, warm, len(GAMES)))
+    # Records are the same as the previous export, so writes and pushes are skipped
+    results.append(measure("cron_export_to_github[unchanged]", lambda: webapp.run_cron_export(),
+                           iterations, speedrun, github, warm, len(GAMES)))
+
+    # Snapshot refreshes: re-fetch everything versus apply newly verified runs
+    current = {game_key: records.get_all_categories(game_key, refresh=True) for game_key in GAMES}
+    results.append(measure("sync_games[full]",
+                           lambda: [delta_sync.sync_game(game_key, current[game_key], full=True) for game_key in GAMES],
+                           iterations, speedrun, github, warm, len(GAMES)))
+    results.append(measure("sync_games[delta]",
+                           lambda: [delta_sync.sync_game(game_key, current[game_key]) for game_key in GAMES],
+                           iterations, speedrun, github, warm, len(GAMES)))
+
+    return {
+        "config": {
+            "latency": latency,
+            "github_latency": github_latency,
+            "iterations": iterations,
+            "warm": warm,
+            "rate_limit": rate_limit,
+            "python": sys.version.split()[0]
+        },
+        "results": results
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compare a report against a baseline
+
+    Args:
+        report (dict): Fresh benchmark report
+        baseline (dict): Previously saved report
+        tolerance (float): Allowed relative slowdown of mean wall time
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    previous = {r["pipeline"]: r for r in baseline["results"]}
+    for result in report["results"]:
+        old = previous.get(result["pipeline"])
+        if old is None:
+            continue
+        old_mean, new_mean = old["wall_time"]["mean"], result["wall_time"]["mean"]
+        if old_mean and new_mean > old_mean * (1 + tolerance):
+            regressions.append(f"{result['pipeline']}: mean wall time {old_mean:.4f}s -> {new_mean:.4f}s")
+        old_calls = sum(sum(v.values()) for v in old["upstream_calls_per_run"].values())
+        new_calls = sum(sum(v.values()) for v in result["upstream_calls_per_run"].values())
+        if new_calls > old_calls:
+            regressions.append(f"{result['pipeline']}: upstream calls per run {old_calls:.1f} -> {new_calls:.1f}")
+    return regressions
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the record-fetch and export pipelines")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected speedrun.com latency in seconds")
+    parser.add_argument("--github-latency", type=float, default=0.1, help="Injected GitHub latency in seconds")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per pipeline")
+    parser.add_argument("--warm", action="store_true", help="Keep caches between iterations")
+    parser.add_argument("--rate-limit", action="store_true", help="Pace stub requests through the real rate limiter")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown when comparing")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.latency, args.github_latency, args.iterations, args.warm, args.rate_limit)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
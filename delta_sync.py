@@ -0,0 +1,252 @@
+"""
+Incremental sync of world records from newly verified runs.
+
+World records change a few times a month, so instead of re-fetching every
+category on each refresh, the delta sync asks speedrun.com for the game's
+runs verified since a stored high-water mark (newest first, usually one
+small page) and applies only those to the affected categories. A run
+replaces a category's record when it matches the category's variable
+filters and beats the current time.
+
+New runs can only make records faster; a rejected or removed world record
+is only noticed by a full resync, which runs every
+SYNC_FULL_RESYNC_INTERVAL, whenever the delta window overflows, and on
+demand.
+"""
+import os
+import logging
+import time
+from datetime import datetime
+
+import requests
+
+import upstream
+import records
+from games import get_game
+from leaderboard_index import compact_player
+from runner_cache import remember_embedded_players
+from store import record_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "delta" applies newly verified runs, "full" re-fetches every category on each refresh
+RECORD_SYNC_MODE = os.environ.get("RECORD_SYNC_MODE", "delta")
+SYNC_FULL_RESYNC_INTERVAL = float(os.environ.get("SYNC_FULL_RESYNC_INTERVAL", "86400"))  # seconds
+SYNC_PAGE_SIZE = int(os.environ.get("SYNC_PAGE_SIZE", "20"))
+# More pages than this since the last sync means a full resync is cheaper
+SYNC_MAX_PAGES = int(os.environ.get("SYNC_MAX_PAGES", "5"))
+
+
+def verified_runs_url(game_id, page_size=SYNC_PAGE_SIZE):
+    """
+    Build the URL of a game's verified runs, most recently verified first
+
+    Args:
+        game_id (str): speedrun.com game ID
+        page_size (int): Runs per page
+
+    Returns:
+        str: The API URL
+    """
+    return (f"{records.SPEEDRUN_API_URL}/runs?game={game_id}&status=verified"
+            f"&orderby=verify-date&direction=desc&embed=players&max={page_size}")
+
+
+def verified_at(run):
+    """
+    Get the time a run was verified
+
+    Returns:
+        float: Unix time, or None if the run carries no verify date
+    """
+    verify_date = (run.get("status") or {}).get("verify-date")
+    if not verify_date:
+        return None
+    try:
+        return datetime.fromisoformat(verify_date.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def fetch_verified_since(game_id, high_water_mark):
+    """
+    Fetch a game's runs verified at or after a high-water mark
+
+    Runs verified exactly at the mark are fetched again; applying a run
+    twice does not change a record.
+
+    Args:
+        game_id (str): speedrun.com game ID
+        high_water_mark (float): Verify time of the newest run already applied
+
+    Returns:
+        tuple: (runs newest first, newest verify time seen or None, True if
+        every run since the mark was fetched within SYNC_MAX_PAGES)
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    runs = []
+    newest = None
+    api_url = verified_runs_url(game_id)
+    try:
+        for _ in range(SYNC_MAX_PAGES):
+            logger.debug(f"Fetching data from: {api_url}")
+            response = upstream.get(api_url)
+            response.raise_for_status()
+            payload = response.json()
+            for run in payload["data"]:
+                run_verified_at = verified_at(run)
+                if run_verified_at is None:
+                    continue
+                newest = run_verified_at if newest is None else max(newest, run_verified_at)
+                if run_verified_at < high_water_mark:
+                    return runs, newest, True
+                runs.append(run)
+            links = payload.get("pagination", {}).get("links", [])
+            api_url = next((link["uri"] for link in links if link.get("rel") == "next"), None)
+            if api_url is None:
+                return runs, newest, True
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+    except (KeyError, TypeError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+    return runs, newest, False
+
+
+def apply_run(game, game_records, run):
+    """
+    Update the records a newly verified run beats
+
+    Args:
+        game (dict): Game definition from the registry
+        game_records (dict): Category keys to record data, updated in place
+        run (dict): Run data from the runs endpoint, with players embedded
+
+    Returns:
+        list: Category keys whose record the run replaced
+    """
+    if run.get("level"):
+        return []
+
+    players = run.get("players") or []
+    if isinstance(players, dict):
+        # embed=players replaces the references with the player resources
+        players = [compact_player(player) for player in players.get("data", [])]
+    leaderboard = {"runs": [{"place": 1, "run": dict(run, players=players)}], "players": {"data": players}}
+    run_time = run["times"]["primary_t"]
+
+    replaced = []
+    for category_key, category in game["categories"].items():
+        if category["id"] != run.get("category"):
+            continue
+        if not records.run_matches(run, records.category_filters(game, category)):
+            continue
+        current = game_records.get(category_key)
+        if current is not None and current["raw_time"] and run_time >= current["raw_time"]:
+            continue
+        game_records[category_key] = records.build_record(game, category_key, leaderboard)
+        replaced.append(category_key)
+    return replaced
+
+
+def latest_verified_at(game_id):
+    """
+    Get the verify time of a game's most recently verified run
+
+    Returns:
+        float: Unix time, or None if the game has no verified runs
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    try:
+        response = upstream.get(verified_runs_url(game_id, page_size=1))
+        response.raise_for_status()
+        runs = response.json()["data"]
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+    except (KeyError, TypeError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+    return verified_at(runs[0]) if runs else None
+
+
+def full_sync(game_key):
+    """
+    Re-fetch every category of a game and reset its high-water mark
+
+    The mark is read before the records, so runs verified while the
+    categories are fetched are picked up by the next delta sync.
+
+    Args:
+        game_key (str): The game key from the registry
+
+    Returns:
+        dict: get_all_categories result
+    """
+    game = get_game(game_key)
+    started_at = time.time()
+    try:
+        # A game without verified runs starts from the epoch
+        high_water_mark = latest_verified_at(game["game_id"]) or 0.0
+    except Exception as e:
+        logger.error(f"Error reading {game_key} high-water mark: {str(e)}")
+        high_water_mark = None
+
+    fresh = records.get_all_categories(game_key, refresh=True)
+    if high_water_mark is not None and fresh and all(record is not None for record in fresh.values()):
+        record_store.save_sync_state(game_key, high_water_mark, started_at)
+    else:
+        # Incomplete: resync again next time rather than delta from a gap
+        record_store.clear_sync_state(game_key)
+    return fresh
+
+
+def sync_game(game_key, current, full=False):
+    """
+    Bring a game's records up to date as cheaply as possible
+
+    Args:
+        game_key (str): The game key from the registry
+        current (dict): The game's current records, category keys to record data
+        full (bool): Re-fetch every category regardless of sync state
+
+    Returns:
+        dict: Category keys to record data; categories that failed to load
+        map to None
+
+    Raises:
+        Exception: If the newly verified runs could not be fetched
+    """
+    if RECORD_SYNC_MODE != "delta":
+        return records.get_all_categories(game_key, refresh=True)
+
+    game = get_game(game_key)
+    state = record_store.sync_state(game_key)
+    if (full or state is None
+            or time.time() - state["full_synced_at"] > SYNC_FULL_RESYNC_INTERVAL
+            or set(current or {}) != set(game["categories"])
+            or any(record is None for record in current.values())):
+        logger.info(f"Full sync of {game_key}")
+        return full_sync(game_key)
+
+    runs, newest, complete = fetch_verified_since(game["game_id"], state["high_water_mark"])
+    if not complete:
+        logger.info(f"More than {SYNC_MAX_PAGES} pages of {game_key} runs verified since the last sync, "
+                    f"resyncing fully")
+        return full_sync(game_key)
+
+    # embed=players replaces each run's player references with the player resources
+    remember_embedded_players([player for run in runs if isinstance(run.get("players"), dict)
+                               for player in run["players"].get("data", [])])
+    updated = dict(current)
+    for run in reversed(runs):
+        for category_key in apply_run(game, updated, run):
+            logger.info(f"New {game_key}/{category_key} record from run {run.get('id')}")
+    record_store.save_sync_state(game_key, max(newest or 0, state["high_water_mark"]), state["full_synced_at"])
+    return updated
@@ -0,0 +1,314 @@
+"""
+Discovery of speedrun.com categories and variables for tracked games.
+
+The IDs in games.json are maintained by hand. The discovery cache holds
+every category of each tracked game with its variables and their values,
+as reported by speedrun.com. It lives in a versioned JSON file that is
+loaded at startup, so startup never needs the network. A background
+refresh brings it up to date once DISCOVERY_REFRESH_INTERVAL has passed
+and flags categories that were added or removed upstream, as well as
+games.json entries whose category, variable or value IDs no longer exist.
+
+Usage:
+    python discovery.py [game_key ...]   # refresh and print the discovered categories
+"""
+import os
+import sys
+import json
+import logging
+import threading
+import tempfile
+import time
+
+import requests
+
+import upstream
+from games import GAMES
+from records import SPEEDRUN_API_URL
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DISCOVERY_CACHE_PATH = os.environ.get(
+    "DISCOVERY_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "discovery.json"))
+DISCOVERY_REFRESH_INTERVAL = float(os.environ.get("DISCOVERY_REFRESH_INTERVAL", "86400"))  # seconds
+# Bump when the layout of the cache file changes; older files are ignored
+DISCOVERY_CACHE_VERSION = 1
+# Detected additions and removals kept per game
+DISCOVERY_MAX_CHANGES = 20
+
+
+def categories_url(game_id):
+    """
+    Build the URL of a game's categories with their variables embedded
+
+    Args:
+        game_id (str): speedrun.com game ID
+
+    Returns:
+        str: The API URL
+    """
+    return f"{SPEEDRUN_API_URL}/games/{game_id}/categories?embed=variables"
+
+
+def compact_variable(variable):
+    """Reduce a variable payload to its ID, name, subcategory flag and value labels."""
+    values = variable.get("values", {})
+    labels = {value_id: value.get("label") for value_id, value in values.get("values", {}).items()}
+    return {
+        "id": variable["id"],
+        "name": variable.get("name"),
+        "is_subcategory": bool(variable.get("is-subcategory")),
+        "default": values.get("default"),
+        "values": labels or dict(values.get("choices", {}))
+    }
+
+
+def compact_category(category):
+    """Reduce a category payload, with embedded variables, to what discovery keeps."""
+    return {
+        "id": category["id"],
+        "name": category.get("name"),
+        "type": category.get("type"),
+        "miscellaneous": bool(category.get("miscellaneous")),
+        "variables": [compact_variable(variable) for variable in category.get("variables", {}).get("data", [])]
+    }
+
+
+def fetch_game_categories(game_id):
+    """
+    Fetch every category of a game with its variables
+
+    Args:
+        game_id (str): speedrun.com game ID
+
+    Returns:
+        list: Compact category dicts in speedrun.com order
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    api_url = categories_url(game_id)
+    try:
+        logger.debug(f"Fetching data from: {api_url}")
+        response = upstream.get(api_url)
+        response.raise_for_status()
+        return [compact_category(category) for category in response.json()["data"]]
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+    except (KeyError, TypeError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+
+
+def diff_categories(previous, current):
+    """
+    Compare two discovered category lists
+
+    Returns:
+        dict: "added" and "removed" lists of {"id", "name"}
+    """
+    previous_ids = {category["id"]: category for category in previous}
+    current_ids = {category["id"]: category for category in current}
+    return {
+        "added": [{"id": c["id"], "name": c["name"]} for c in current if c["id"] not in previous_ids],
+        "removed": [{"id": c["id"], "name": c["name"]} for c in previous if c["id"] not in current_ids]
+    }
+
+
+def check_registry(game, categories):
+    """
+    Find games.json entries that refer to IDs speedrun.com no longer reports
+
+    Args:
+        game (dict): Game definition from the registry
+        categories (list): The game's discovered categories
+
+    Returns:
+        list: Human-readable problem descriptions
+    """
+    discovered = {category["id"]: category for category in categories}
+    problems = []
+    for category_key, category in game["categories"].items():
+        found = discovered.get(category["id"])
+        if found is None:
+            problems.append(f"{game['key']}/{category_key}: category {category['id']} not found")
+            continue
+        variables = {variable["id"]: variable for variable in found["variables"]}
+        for variable in category["main_game_variable"]:
+            if variable["id"] not in variables:
+                problems.append(f"{game['key']}/{category_key}: variable {variable['id']} not found")
+            elif variable["value"] not in variables[variable["id"]]["values"]:
+                problems.append(f"{game['key']}/{category_key}: value {variable['value']} "
+                                f"of variable {variable['id']} not found")
+    return problems
+
+
+class DiscoveryCache:
+    """
+    Discovered categories per speedrun.com game ID, persisted to a JSON file.
+
+    Each game entry carries a revision that increases whenever its category
+    list changes, and the additions and removals that were detected.
+    """
+
+    def __init__(self, path=DISCOVERY_CACHE_PATH, refresh_interval=DISCOVERY_REFRESH_INTERVAL,
+                 fetcher=fetch_game_categories):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.fetcher = fetcher
+        self._games = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load the cache file, ignoring a missing, corrupt or outdated one."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            if stored.get("version") != DISCOVERY_CACHE_VERSION:
+                logger.warning(f"Ignoring discovery cache {self.path} with version {stored.get('version')}")
+                return
+            with self._lock:
+                self._games = stored["games"]
+            logger.debug(f"Loaded discovered categories of {len(stored['games'])} games from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading discovery cache: {str(e)}")
+
+    def _save(self):
+        """Write the cache to disk atomically."""
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                stored = {"version": DISCOVERY_CACHE_VERSION, "games": self._games}
+                body = json.dumps(stored, indent=2)
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            # A temp file per write, so concurrent saves never share one
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix=".tmp", delete=False) as f:
+                f.write(body)
+            os.replace(f.name, self.path)
+        except Exception as e:
+            logger.error(f"Error saving discovery cache: {str(e)}")
+
+    def categories(self, game_id):
+        """
+        Get a game's discovered categories
+
+        Returns:
+            list: Compact category dicts, or None if the game was never discovered
+        """
+        with self._lock:
+            entry = self._games.get(game_id)
+            return entry["categories"] if entry else None
+
+    def refresh_game(self, game_id):
+        """
+        Fetch a game's categories and record any additions or removals
+
+        Args:
+            game_id (str): speedrun.com game ID
+
+        Returns:
+            dict: "added" and "removed" categories, empty on the first discovery
+
+        Raises:
+            Exception: If there's an error fetching the data
+        """
+        categories = self.fetcher(game_id)
+        now = time.time()
+        with self._lock:
+            entry = self._games.get(game_id)
+            if entry is None:
+                change = {"added": [], "removed": []}
+                self._games[game_id] = {"revision": 1, "fetched_at": now, "changes": [], "categories": categories}
+            else:
+                change = diff_categories(entry["categories"], categories)
+                if categories != entry["categories"]:
+                    entry["revision"] += 1
+                if change["added"] or change["removed"]:
+                    entry["changes"] = (entry["changes"] + [dict(change, detected_at=now)])[-DISCOVERY_MAX_CHANGES:]
+                entry.update(fetched_at=now, categories=categories)
+        self._save()
+
+        for category in change["added"]:
+            logger.warning(f"New speedrun.com category in game {game_id}: {category['name']} ({category['id']})")
+        for category in change["removed"]:
+            logger.warning(f"speedrun.com category removed from game {game_id}: {category['name']} ({category['id']})")
+        return change
+
+    def registry_problems(self):
+        """Check every tracked game against its discovered categories."""
+        problems = []
+        for game in GAMES.values():
+            categories = self.categories(game["game_id"])
+            if categories is not None:
+                problems.extend(check_registry(game, categories))
+        return problems
+
+    def refresh_due(self, force=False):
+        """
+        Refresh the games whose discovery is older than the refresh interval
+
+        Args:
+            force (bool): Refresh every tracked game regardless of age
+
+        Returns:
+            dict: speedrun.com game ID to detected change, or to an error message
+        """
+        # Pick up refreshes other workers wrote to the cache file
+        self._load()
+        results = {}
+        now = time.time()
+        for game_id in dict.fromkeys(game["game_id"] for game in GAMES.values()):
+            with self._lock:
+                entry = self._games.get(game_id)
+            if not force and entry is not None and now - entry["fetched_at"] < self.refresh_interval:
+                continue
+            try:
+                results[game_id] = self.refresh_game(game_id)
+            except Exception as e:
+                logger.error(f"Error discovering categories of game {game_id}: {str(e)}")
+                results[game_id] = {"error": str(e)}
+        if results:
+            for problem in self.registry_problems():
+                logger.warning(f"games.json is out of date: {problem}")
+        return results
+
+    def status(self):
+        """Return revision, fetch time, category count and detected changes per game, plus registry problems."""
+        with self._lock:
+            games = {
+                game_id: {
+                    "revision": entry["revision"],
+                    "fetched_at": entry["fetched_at"],
+                    "categories": len(entry["categories"]),
+                    "changes": entry["changes"]
+                }
+                for game_id, entry in self._games.items()
+            }
+        return {"games": games, "registry_problems": self.registry_problems()}
+
+
+# One cache per process, shared through the cache file
+discovery_cache = DiscoveryCache()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    game_keys = sys.argv[1:] or list(GAMES)
+    for game_key in game_keys:
+        game_id = GAMES[game_key]["game_id"]
+        discovery_cache.refresh_game(game_id)
+        print(f"{GAMES[game_key]['name']} ({game_id})")
+        for category in discovery_cache.categories(game_id):
+            print(f"  {category['id']}  {category['name']} [{category['type']}]")
+            for variable in category["variables"]:
+                print(f"    {variable['id']}  {variable['name']}: "
+                      + ", ".join(f"{value_id}={label}" for value_id, label in variable["values"].items()))
+    for problem in discovery_cache.registry_problems():
+        print(f"Out of date: {problem}")
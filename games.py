@@ -0,0 +1,73 @@
+"""
+Registry of tracked games, loaded from games.json.
+
+Each entry describes a speedrun.com game and the categories we track for
+it. Adding a game means adding an entry to the config file.
+"""
+import os
+import json
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+GAMES_CONFIG_PATH = os.environ.get(
+    "GAMES_CONFIG", os.path.join(os.path.dirname(__file__), "games.json"))
+
+REQUIRED_GAME_FIELDS = ("name", "game_id", "weblink", "export_prefix", "github_filename", "categories")
+
+# Optional fields and their defaults
+GAME_DEFAULTS = {
+    "date_field": "date",
+    "date_format": "%Y-%m-%d",
+    "apply_variables": True
+}
+
+
+def load_games(path=GAMES_CONFIG_PATH):
+    """
+    Load the game registry from a JSON config file
+
+    Args:
+        path (str): Path to the config file
+
+    Returns:
+        dict: Game key to game definition, in config order
+
+    Raises:
+        ValueError: If a game is missing a required field
+    """
+    with open(path, 'r') as f:
+        config = json.load(f)
+
+    games = {}
+    for game_key, game in config.items():
+        missing = [field for field in REQUIRED_GAME_FIELDS if field not in game]
+        if missing:
+            raise ValueError(f"Game '{game_key}' in {path} is missing: {', '.join(missing)}")
+
+        game = {**GAME_DEFAULTS, **game}
+        game["key"] = game_key
+        game.setdefault("label", game["name"])
+        for category in game["categories"].values():
+            category.setdefault("main_game_variable", [])
+        games[game_key] = game
+
+    logger.debug(f"Loaded {len(games)} games from {path}")
+    return games
+
+
+GAMES = load_games()
+
+
+def get_game(game_key):
+    """
+    Look up a game definition
+
+    Args:
+        game_key (str): The game key from the registry
+
+    Returns:
+        dict: The game definition or None if the game is not registered
+    """
+    return GAMES.get(game_key)
@@ -0,0 +1,92 @@
+"""
+HTTP caching helpers: content-hash ETags, Cache-Control and conditional GETs.
+"""
+import os
+import json
+import hashlib
+
+from flask import jsonify, request, send_file
+
+# Cache-Control lifetimes in seconds, per kind of route
+API_CACHE_MAX_AGE = int(os.environ.get("API_CACHE_MAX_AGE", "60"))
+API_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("API_CACHE_STALE_WHILE_REVALIDATE", "300"))
+EXPORT_CACHE_MAX_AGE = int(os.environ.get("EXPORT_CACHE_MAX_AGE", "300"))
+EXPORT_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("EXPORT_CACHE_STALE_WHILE_REVALIDATE", "3600"))
+
+
+def content_etag(payload):
+    """
+    Derive a strong ETag from JSON-serialisable data
+
+    Args:
+        payload: The data that will be sent to the client
+
+    Returns:
+        str: Hex digest that only changes when the data does
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()[:32]
+
+
+def file_etag(file_path):
+    """
+    Derive a strong ETag from a file's contents
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def cache_control(max_age, stale_while_revalidate):
+    """Build a public Cache-Control header value."""
+    return f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+
+def cacheable_json(payload, last_modified=None, max_age=API_CACHE_MAX_AGE,
+                   stale_while_revalidate=API_CACHE_STALE_WHILE_REVALIDATE):
+    """
+    Build a JSON response with caching headers, answering 304 when the
+    client already has this representation
+
+    Args:
+        payload: JSON-serialisable response body
+        last_modified (float): Unix time the data last changed, if known
+        max_age (int): Seconds clients and CDNs may reuse the response
+        stale_while_revalidate (int): Extra seconds a stale copy may be served
+
+    Returns:
+        flask.Response: 200 with the body, or 304 without it
+    """
+    response = jsonify(payload)
+    response.set_etag(content_etag(payload))
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = cache_control(max_age, stale_while_revalidate)
+    return response.make_conditional(request)
+
+
+def cacheable_file(file_path, max_age=EXPORT_CACHE_MAX_AGE,
+                   stale_while_revalidate=EXPORT_CACHE_STALE_WHILE_REVALIDATE):
+    """
+    Send an export file as an attachment with a content-hash ETag
+
+    Args:
+        file_path (str): Path to the file
+        max_age (int): Seconds clients and CDNs may reuse the response
+        stale_while_revalidate (int): Extra seconds a stale copy may be served
+
+    Returns:
+        flask.Response: 200 with the file, or 304 without it
+    """
+    response = send_file(file_path, as_attachment=True, etag=file_etag(file_path),
+                         last_modified=os.path.getmtime(file_path), conditional=True)
+    response.headers["Cache-Control"] = cache_control(max_age, stale_while_revalidate)
+    return response
@@ -0,0 +1,118 @@
+"""
+Background job queue for exports and GitHub pushes.
+
+Routes enqueue work and return a job ID straight away; a local worker
+thread runs the job. Job state lives in the record store, so the status of
+a job can be read from any gunicorn worker, and a job is not enqueued again
+while an identical one is still queued or running.
+"""
+import os
+import uuid
+import queue
+import logging
+import threading
+import time
+
+from store import record_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_ABANDONED_AFTER = float(os.environ.get("JOB_ABANDONED_AFTER", "3600"))  # seconds
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", str(7 * 24 * 3600)))  # seconds
+
+# Job statuses, in the order a job moves through them
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class JobQueue:
+    """
+    Deduplicating job queue with local worker threads.
+
+    Jobs are identified by a key describing the work, e.g. "push:outlast".
+    Submitting a key that already has a queued or running job returns that
+    job instead of starting a second one. Jobs stuck as active for longer
+    than JOB_ABANDONED_AFTER, e.g. because their worker process died, no
+    longer block new ones.
+    """
+
+    def __init__(self, store=record_store, workers=JOB_WORKERS):
+        self.store = store
+        self.workers = max(1, workers)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, job_key, func, *args):
+        """
+        Enqueue func(*args) unless an identical job is already active
+
+        Args:
+            job_key (str): Identifies the work for deduplication
+            func (callable): Function to run; its return value must be
+                JSON-serialisable and becomes the job result
+            *args: Positional arguments for func
+
+        Returns:
+            tuple: (job dict, True if the job was newly enqueued)
+
+        Raises:
+            Exception: If the job could not be recorded in the store
+        """
+        job, created = self.store.create_job(uuid.uuid4().hex, job_key, ACTIVE_STATUSES,
+                                             time.time() - JOB_ABANDONED_AFTER)
+        if created:
+            self.start()
+            self._queue.put((job["job_id"], job_key, func, args))
+            logger.info(f"Queued job {job['job_id']} ({job_key})")
+        else:
+            logger.info(f"Job {job_key} already {job['status']} as {job['job_id']}, not queuing again")
+        return job, created
+
+    def get(self, job_id):
+        """Return a job by ID, or None."""
+        return self.store.get_job(job_id)
+
+    def recent(self, limit=20):
+        """Return the most recent jobs, newest first."""
+        return self.store.recent_jobs(limit)
+
+    def _work(self):
+        """Worker loop: run queued jobs one at a time."""
+        while True:
+            job_id, job_key, func, args = self._queue.get()
+            self.store.update_job(job_id, RUNNING, started_at=time.time())
+            try:
+                result = func(*args)
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job_key}) failed: {str(e)}")
+                self.store.update_job(job_id, FAILED, finished_at=time.time(), error=str(e))
+            else:
+                self.store.update_job(job_id, SUCCEEDED, finished_at=time.time(), result=result)
+                logger.info(f"Job {job_id} ({job_key}) finished")
+            finally:
+                self.store.release_job(job_id)
+                self.store.prune_jobs(time.time() - JOB_RETENTION)
+                self._queue.task_done()
+
+    def start(self):
+        """Start the worker threads once per process."""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Job queue started with {self.workers} worker thread(s)")
+
+
+# One queue per process; job state is shared through the record store
+job_queue = JobQueue()
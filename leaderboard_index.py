@@ -0,0 +1,86 @@
+"""
+Compact local index over a category's full leaderboard.
+
+One unfiltered leaderboard download holds the runs of every subcategory of
+a category. The index keeps just the run fields records are built from and
+a value -> positions map per variable, so any subcategory or top-N slice is
+answered locally instead of with a var- filtered request per combination.
+"""
+# Run fields kept from the API payload; enough for records.build_record
+RUN_FIELDS = ("id", "players", "date", "submitted", "values")
+
+
+def compact_run(run):
+    """Reduce a run payload to the fields records are built from."""
+    compact = {field: run.get(field) for field in RUN_FIELDS}
+    compact["times"] = {"primary_t": run["times"]["primary_t"]}
+    compact["values"] = compact["values"] or {}
+    return compact
+
+
+def compact_player(player):
+    """Reduce an embedded player to what runner name lookups read."""
+    if player.get("rel") == "guest":
+        return {"rel": "guest", "name": player.get("name")}
+    return {"rel": player.get("rel"), "id": player.get("id"),
+            "names": {"international": player.get("names", {}).get("international")}}
+
+
+class LeaderboardIndex:
+    """
+    A category's full leaderboard, sliceable by variable values.
+
+    Runs are kept in leaderboard order, so the first match of a slice is
+    its world record.
+    """
+
+    __slots__ = ("category_id", "runs", "players", "_positions")
+
+    def __init__(self, leaderboard):
+        entries = sorted(leaderboard.get("runs", []), key=lambda entry: entry.get("place") or float("inf"))
+        self.category_id = leaderboard.get("category")
+        self.runs = [compact_run(entry["run"]) for entry in entries]
+        self.players = [compact_player(player) for player in leaderboard.get("players", {}).get("data", [])]
+        self._positions = {}
+        for position, run in enumerate(self.runs):
+            for variable_id, value in run["values"].items():
+                self._positions.setdefault((variable_id, value), []).append(position)
+
+    def __len__(self):
+        return len(self.runs)
+
+    def positions(self, variables=()):
+        """
+        Find the runs matching every variable filter
+
+        Args:
+            variables (list): {"id", "value"} filters, as in main_game_variable
+
+        Returns:
+            list: Positions of matching runs in leaderboard order
+        """
+        if not variables:
+            return list(range(len(self.runs)))
+        matches = None
+        for variable in variables:
+            found = set(self._positions.get((variable["id"], variable["value"]), ()))
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return sorted(matches)
+
+    def top(self, variables=(), n=1):
+        """
+        Slice the leaderboard to a subcategory's best n runs
+
+        Args:
+            variables (list): {"id", "value"} filters, as in main_game_variable
+            n (int): Number of runs to return
+
+        Returns:
+            dict: A leaderboard payload of the form build_record expects, with
+            places renumbered within the slice
+        """
+        runs = [{"place": place, "run": self.runs[position]}
+                for place, position in enumerate(self.positions(variables)[:n], start=1)]
+        return {"runs": runs, "players": {"data": self.players}}
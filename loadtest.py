@@ -0,0 +1,220 @@
+"""
+Load-test harness for the Flask routes under gunicorn.
+
+Starts gunicorn once per worker class with speedrun.com replaced by the
+benchmark stub, drives each route with concurrent clients, and reports
+requests per second and latency percentiles as JSON.
+
+Usage:
+    python loadtest.py [--worker-classes sync,gthread,gevent] [--workers 2]
+                       [--threads 4] [--concurrency 16] [--duration 10]
+                       [--latency 0.05] [--output loadtest.json]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import importlib.util
+import subprocess
+import threading
+import statistics
+
+import requests
+
+DEFAULT_ROUTES = ["/", "/api/outlastwr", "/api/outlast/categories", "/api/games"]
+DEFAULT_WORKER_CLASSES = ["sync", "gthread", "gevent"]
+
+# Extra Python packages each gunicorn worker class needs
+WORKER_CLASS_MODULES = {"gevent": "gevent", "eventlet": "eventlet"}
+
+
+def create_app():
+    """
+    Build the app with speedrun.com replaced by the benchmark stub
+
+    gunicorn calls this as loadtest:create_app(); the stub latency comes
+    from LOADTEST_LATENCY.
+    """
+    from benchmark import StubSpeedrun
+    import upstream
+    from app import app
+
+    upstream.transport = StubSpeedrun(float(os.environ.get("LOADTEST_LATENCY", "0.05")))
+    return app
+
+
+def free_port():
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def start_server(worker_class, workers, threads, latency):
+    """
+    Start gunicorn with the stubbed app and wait until it answers
+
+    Returns:
+        tuple: (Popen process, base URL)
+
+    Raises:
+        RuntimeError: If the server does not come up
+    """
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "gunicorn", "loadtest:create_app()",
+               "--bind", f"127.0.0.1:{port}", "--worker-class", worker_class,
+               "--workers", str(workers), "--log-level", "warning"]
+    if worker_class == "gthread":
+        command += ["--threads", str(threads)]
+    store_url = f"sqlite:///{tempfile.mkdtemp(prefix='speedrun-loadtest-')}/store.db"
+    env = dict(os.environ, LOADTEST_LATENCY=str(latency), RUNNER_CACHE_PATH="",
+               DISCOVERY_CACHE_PATH="", SNAPSHOT_PATH="", RECORD_STORE_URL=store_url)
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            requests.get(f"{base_url}/api/games", timeout=1)
+            return process, base_url
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 30 seconds")
+
+
+def drive_route(url, concurrency, duration):
+    """
+    Hit one URL from concurrent clients for a fixed time
+
+    Returns:
+        dict: Request counts, RPS and latency percentiles in milliseconds
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        local_latencies, local_errors = [], 0
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                response.content
+                if response.status_code >= 500:
+                    local_errors += 1
+            except requests.exceptions.RequestException:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    workers = [threading.Thread(target=client) for _ in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    as_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": as_ms(statistics.mean(latencies)) if latencies else None,
+            "p50": as_ms(percentile(latencies, 50)),
+            "p95": as_ms(percentile(latencies, 95)),
+            "p99": as_ms(percentile(latencies, 99)),
+            "max": as_ms(latencies[-1]) if latencies else None
+        }
+    }
+
+
+def run_worker_class(worker_class, routes, args):
+    """
+    Load-test every route against one gunicorn worker class
+
+    Returns:
+        dict: Per-route results, or the reason the class was skipped
+    """
+    module = WORKER_CLASS_MODULES.get(worker_class)
+    if module and importlib.util.find_spec(module) is None:
+        print(f"Skipping {worker_class}: {module} is not installed", file=sys.stderr)
+        return {"skipped": f"{module} is not installed"}
+
+    process, base_url = start_server(worker_class, args.workers, args.threads, args.latency)
+    try:
+        # Let the snapshot refresher load every game before measuring
+        for route in routes:
+            requests.get(f"{base_url}{route}", timeout=60)
+
+        results = {}
+        for route in routes:
+            results[route] = drive_route(f"{base_url}{route}", args.concurrency, args.duration)
+            latency = results[route]["latency_ms"]
+            print(f"{worker_class:<8} {route:<32} {results[route]['rps']:>8} rps  "
+                  f"p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  "
+                  f"errors {results[route]['errors']}", file=sys.stderr)
+        return {"routes": results}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Load-test the Flask routes under gunicorn")
+    parser.add_argument("--worker-classes", default=",".join(DEFAULT_WORKER_CLASSES),
+                        help="Comma-separated gunicorn worker classes")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="Threads per gthread worker")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to drive each route")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected speedrun.com latency in seconds")
+    parser.add_argument("--routes", default=",".join(DEFAULT_ROUTES), help="Comma-separated routes to drive")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    routes = [route for route in args.routes.split(",") if route]
+    report = {
+        "config": {
+            "workers": args.workers,
+            "threads": args.threads,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "latency": args.latency
+        },
+        "worker_classes": {
+            worker_class: run_worker_class(worker_class, routes, args)
+            for worker_class in args.worker_classes.split(",") if worker_class
+        }
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Shared in-process cache for speedrun.com record lookups.
+"""
+import os
+import logging
+import threading
+import time
+import functools
+from collections import OrderedDict
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+RECORD_CACHE_TTL = float(os.environ.get("RECORD_CACHE_TTL", "300"))  # seconds
+RECORD_CACHE_MAX_ENTRIES = int(os.environ.get("RECORD_CACHE_MAX_ENTRIES", "256"))
+
+
+class _InFlight:
+    """A pending load that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded cache with per-entry expiry.
+
+    Concurrent misses for the same key are collapsed so that only one
+    caller runs the loader; the others wait for and share its result.
+    """
+
+    def __init__(self, ttl=RECORD_CACHE_TTL, max_entries=RECORD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for key, calling loader() on a miss
+
+        Args:
+            key (hashable): Cache key
+            loader (callable): Zero-argument function producing the value
+
+        Returns:
+            The cached or freshly loaded value
+
+        Raises:
+            Exception: Whatever the loader raised; failures are not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            self.set(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.event.set()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key without loading it
+
+        Args:
+            key (hashable): Cache key
+            default: Returned when the key is missing or expired
+
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def peek(self, key):
+        """
+        Return a cached value even if it has expired, as long as it was not evicted
+
+        Args:
+            key (hashable): Cache key
+
+        Returns:
+            tuple: (value, True if it has not expired), or None if the key is
+            not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return entry[1], entry[0] > time.monotonic()
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "collapsed": self.collapsed,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl
+            }
+
+
+# One cache shared by every game module
+record_cache = TTLCache()
+
+
+def cached_record(namespace):
+    """
+    Decorator that routes a record lookup through the shared record cache
+
+    Args:
+        namespace (str): Prefix that keeps keys from different games apart
+
+    Returns:
+        callable: Decorator for a function whose positional args form the key;
+        the wrapped function gains a refresh(*args) method
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            return record_cache.get_or_load((namespace,) + args, lambda: func(*args))
+
+        def refresh(*args):
+            """Bypass the cache, then store the fresh value for later lookups."""
+            value = func(*args)
+            record_cache.set((namespace,) + args, value)
+            return value
+
+        wrapper.refresh = refresh
+        return wrapper
+    return decorator
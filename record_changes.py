@@ -0,0 +1,95 @@
+"""
+Change detection for exported record sets.
+
+A game's records are normalised to the fields that identify a world record
+and fingerprinted, so exports and GitHub pushes can be skipped when nothing
+changed since the last export.
+"""
+import json
+import hashlib
+
+from records import format_time
+
+# Record fields that identify a world record
+IDENTITY_FIELDS = ("category", "raw_time", "runner", "date")
+
+
+def normalize_records(categories_data, previous=None):
+    """
+    Reduce a get_all_categories result to the fields that identify each record
+
+    Categories that failed to load keep their previously exported value, so
+    a transient upstream error does not look like a removed record.
+
+    Args:
+        categories_data (dict): Category keys to record data or None
+        previous (dict): Normalised records of the last export, if any
+
+    Returns:
+        dict: Category keys to {field: value} for IDENTITY_FIELDS
+    """
+    previous = previous or {}
+    normalized = {}
+    for category_key, record in categories_data.items():
+        if record is None:
+            if category_key in previous:
+                normalized[category_key] = previous[category_key]
+            continue
+        normalized[category_key] = {field: record.get(field) for field in IDENTITY_FIELDS}
+    return normalized
+
+
+def fingerprint(normalized):
+    """
+    Hash a normalised record set
+
+    Returns:
+        str: Hex digest that only changes when a record does
+    """
+    body = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _describe_time(raw_time):
+    """Format a raw time for change reasons."""
+    return format_time(raw_time)[1] if raw_time else "no time"
+
+
+def diff_records(previous, current):
+    """
+    List the categories that differ between two normalised record sets
+
+    Args:
+        previous (dict): Normalised records of the last export, or None
+        current (dict): Normalised records about to be exported
+
+    Returns:
+        list: {"category_key", "category", "reasons"} per changed category
+    """
+    if previous is None:
+        return [{"category_key": key, "category": record["category"], "reasons": ["first export"]}
+                for key, record in current.items()]
+
+    changes = []
+    for key in sorted(set(previous) | set(current)):
+        old, new = previous.get(key), current.get(key)
+        if old == new:
+            continue
+        if old is None:
+            reasons = ["category added"]
+        elif new is None:
+            reasons = ["category removed"]
+        else:
+            reasons = []
+            if old["raw_time"] != new["raw_time"]:
+                direction = "faster" if (new["raw_time"] or 0) < (old["raw_time"] or 0) else "slower"
+                reasons.append(f"time {_describe_time(old['raw_time'])} -> "
+                               f"{_describe_time(new['raw_time'])} ({direction})")
+            if old["runner"] != new["runner"]:
+                reasons.append(f"runner {old['runner']} -> {new['runner']}")
+            if old["date"] != new["date"]:
+                reasons.append(f"date {old['date']} -> {new['date']}")
+            if old["category"] != new["category"]:
+                reasons.append(f"renamed {old['category']} -> {new['category']}")
+        changes.append({"category_key": key, "category": (new or old)["category"], "reasons": reasons})
+    return changes
@@ -0,0 +1,567 @@
+"""
+Fetch and format engine for world records of every registered game.
+"""
+import os
+import logging
+import threading
+from datetime import datetime
+
+import requests
+
+import upstream
+from games import GAMES, get_game
+from record_cache import cached_record, record_cache
+from leaderboard_index import LeaderboardIndex
+from runner_cache import runner_names, embedded_runner_name, remember_embedded_players
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SPEEDRUN_API_URL = "https://www.speedrun.com/api/v1"
+
+# "game" pulls every category of a game from one paginated records request,
+# "leaderboard" downloads each category's full leaderboard once and slices it
+# locally, "category" asks for each subcategory's leaderboard separately
+RECORDS_FETCH_MODE = os.environ.get("RECORDS_FETCH_MODE", "game")
+# Runs per category fetched in game mode, so variable filters can be matched locally
+GAME_RECORDS_TOP = int(os.environ.get("GAME_RECORDS_TOP", "10"))
+GAME_RECORDS_PAGE_SIZE = 200
+
+
+def format_time(time_seconds):
+    """
+    Format time in seconds to HH:MM:SS and HH:MM:SS.ms formats
+
+    Args:
+        time_seconds (float): Time in seconds
+
+    Returns:
+        tuple: (formatted_time, detailed_time)
+    """
+    hours = int(time_seconds // 3600)
+    minutes = int((time_seconds % 3600) // 60)
+    seconds = int(time_seconds % 60)
+    milliseconds = int((time_seconds % 1) * 1000)
+
+    # If hours is 0, only show minutes and seconds
+    if hours == 0:
+        formatted_time = f"{minutes:02d}:{seconds:02d}"
+        detailed_time = f"{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+    else:
+        formatted_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        detailed_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+    return formatted_time, detailed_time
+
+def get_runner_name(player_data, embedded_players=None):
+    """
+    Get runner name from player data
+
+    Args:
+        player_data (dict): Player data from the API
+        embedded_players (list): Players embedded in the leaderboard response
+
+    Returns:
+        str: Runner name
+    """
+    runner_name = embedded_runner_name(player_data, embedded_players)
+    if runner_name:
+        return runner_name
+
+    runner_name = "Unknown"
+
+    if "id" in player_data:
+        try:
+            runner_name = runner_names.get(player_data["id"])
+        except Exception as e:
+            logger.error(f"Error fetching runner data: {str(e)}")
+
+    return runner_name
+
+def get_submission_date(run_data, game):
+    """
+    Get formatted date from run data, using the game's date settings
+
+    Args:
+        run_data (dict): Run data from the API
+        game (dict): Game definition from the registry
+
+    Returns:
+        str: Formatted date string
+    """
+    date_str = run_data.get(game["date_field"])
+    if not date_str:
+        return "Unknown Date"
+    try:
+        date_obj = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        return date_obj.strftime(game["date_format"])
+    except ValueError as e:
+        logger.error(f"Error formatting date: {str(e)}")
+        return "Unknown Date"
+
+def leaderboard_url(game, category):
+    """
+    Build the top-1 leaderboard URL for a category
+
+    Args:
+        game (dict): Game definition from the registry
+        category (dict): Category definition from the game
+
+    Returns:
+        str: The API URL
+    """
+    api_url = f"{SPEEDRUN_API_URL}/leaderboards/{game['game_id']}/category/{category['id']}?top=1&embed=players"
+
+    # Narrow to the subcategory if the game is configured to do so
+    if game["apply_variables"]:
+        for variable in category["main_game_variable"]:
+            api_url += f"&var-{variable['id']}={variable['value']}"
+
+    return api_url
+
+def game_records_url(game_id):
+    """
+    Build the URL of the first page of a game's full-game records
+
+    Args:
+        game_id (str): speedrun.com game ID
+
+    Returns:
+        str: The API URL
+    """
+    return (f"{SPEEDRUN_API_URL}/games/{game_id}/records?top={GAME_RECORDS_TOP}"
+            f"&scope=full-game&skip-empty=false&embed=players&max={GAME_RECORDS_PAGE_SIZE}")
+
+def full_leaderboard_url(game_id, category_id):
+    """
+    Build the URL of a category's unfiltered, untruncated leaderboard
+
+    Args:
+        game_id (str): speedrun.com game ID
+        category_id (str): speedrun.com category ID
+
+    Returns:
+        str: The API URL
+    """
+    return f"{SPEEDRUN_API_URL}/leaderboards/{game_id}/category/{category_id}?embed=players"
+
+def category_filters(game, category):
+    """
+    Variable filters that select a category's subcategory
+
+    Returns:
+        list: The category's main_game_variable list, or an empty list if
+        the game is configured to use the unfiltered leaderboard
+    """
+    return category["main_game_variable"] if game["apply_variables"] else []
+
+def run_matches(run, variables):
+    """
+    Check whether a run belongs to a subcategory
+
+    Args:
+        run (dict): Run data from the API
+        variables (list): The category's main_game_variable filters
+
+    Returns:
+        bool: True if the run has every filtered variable value
+    """
+    values = run.get("values", {})
+    return all(values.get(variable["id"]) == variable["value"] for variable in variables)
+
+def category_leaderboard(game, category, leaderboard):
+    """
+    Narrow a top-N leaderboard from the records endpoint to one of our categories
+
+    Args:
+        game (dict): Game definition from the registry
+        category (dict): Category definition from the game
+        leaderboard (dict): Leaderboard from the game records response
+
+    Returns:
+        dict: A leaderboard holding just the category's top run, or None if
+        none of the fetched runs match its variable filters
+    """
+    runs = leaderboard.get("runs", [])
+    if game["apply_variables"]:
+        runs = [entry for entry in runs if run_matches(entry["run"], category["main_game_variable"])]
+        if not runs and leaderboard.get("runs"):
+            # The subcategory's best run is further down than we fetched
+            return None
+    return {"runs": runs[:1], "players": leaderboard.get("players", {})}
+
+def build_record(game, category_key, leaderboard):
+    """
+    Turn a leaderboard payload into our record format
+
+    Args:
+        game (dict): Game definition from the registry
+        category_key (str): The category key within the game
+        leaderboard (dict): The "data" object of a leaderboard response
+
+    Returns:
+        dict: The record data
+    """
+    category = game["categories"][category_key]
+    record = {
+        "game": game["name"],
+        "category": category["name"],
+        "category_id": category["id"],
+        "category_key": category_key
+    }
+
+    runs = leaderboard.get("runs", [])
+    if not runs:
+        record.update({
+            "raw_time": 0,
+            "formatted_time": "N/A",
+            "detailed_time": "N/A",
+            "runner": "No runs yet",
+            "date": "N/A"
+        })
+        return record
+
+    record.update(run_fields(game, runs[0]["run"], leaderboard))
+    return record
+
+def run_fields(game, run, leaderboard):
+    """
+    Format the time, runner and date of a leaderboard run
+
+    Args:
+        game (dict): Game definition from the registry
+        run (dict): Run data from the leaderboard
+        leaderboard (dict): The leaderboard the run came from, for embedded players
+
+    Returns:
+        dict: raw_time, formatted_time, detailed_time, runner and date
+    """
+    run_time = run["times"]["primary_t"]
+    formatted_time, detailed_time = format_time(run_time)
+
+    player_data = run["players"][0]
+    if "id" in player_data or player_data.get("rel") == "guest":
+        runner_name = get_runner_name(player_data, leaderboard.get("players", {}).get("data"))
+    else:
+        runner_name = "Unknown Runner"
+
+    return {
+        "raw_time": run_time,
+        "formatted_time": formatted_time,
+        "detailed_time": detailed_time,
+        "runner": runner_name,
+        "date": get_submission_date(run, game)
+    }
+
+@cached_record("records")
+def get_category_record(game_key, category_key):
+    """
+    Get the world record for a category of a registered game
+
+    Args:
+        game_key (str): The game key from the registry
+        category_key (str): The category key within the game
+
+    Returns:
+        dict: The record data or None if the game or category is not found
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    game = get_game(game_key)
+    if game is None or category_key not in game["categories"]:
+        logger.error(f"Unknown category key: {game_key}/{category_key}")
+        return None
+
+    api_url = leaderboard_url(game, game["categories"][category_key])
+
+    try:
+        logger.debug(f"Fetching data from: {api_url}")
+        response = upstream.get(api_url)
+        response.raise_for_status()
+        leaderboard = response.json()["data"]
+        remember_embedded_players(leaderboard.get("players", {}).get("data"))
+        return build_record(game, category_key, leaderboard)
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+    except (KeyError, IndexError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise Exception(f"Unknown error: {str(e)}")
+
+@cached_record("game_records")
+def get_game_leaderboards(game_id):
+    """
+    Fetch the top runs of every full-game category of a game, following pagination
+
+    Keyed by speedrun.com game ID, so registry games that share one (e.g. a
+    DLC listed under its base game) share the request.
+
+    Args:
+        game_id (str): speedrun.com game ID
+
+    Returns:
+        dict: speedrun.com category ID to leaderboard data
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    leaderboards = {}
+    players = []
+    api_url = game_records_url(game_id)
+    try:
+        while api_url:
+            logger.debug(f"Fetching data from: {api_url}")
+            response = upstream.get(api_url)
+            response.raise_for_status()
+            payload = response.json()
+            for leaderboard in payload["data"]:
+                if not leaderboard.get("level"):
+                    leaderboards[leaderboard["category"]] = leaderboard
+                    players.extend(leaderboard.get("players", {}).get("data", []))
+            links = payload.get("pagination", {}).get("links", [])
+            api_url = next((link["uri"] for link in links if link.get("rel") == "next"), None)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+    except (KeyError, TypeError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+    remember_embedded_players(players)
+    return leaderboards
+
+def records_from_game_leaderboards(game_key, refresh=False):
+    """
+    Build records for every category a single game records fetch can answer
+
+    Categories whose subcategory run is not among the fetched top runs are
+    left out, so the caller can fetch their leaderboards one by one.
+
+    Args:
+        game_key (str): The game key from the registry
+        refresh (bool): Skip the record cache and fetch from upstream
+
+    Returns:
+        dict: Category keys to record data
+    """
+    game = get_game(game_key)
+    lookup = get_game_leaderboards.refresh if refresh else get_game_leaderboards
+    try:
+        leaderboards = lookup(game["game_id"])
+    except Exception as e:
+        logger.error(f"Error fetching {game_key} game records, falling back to per-category requests: {str(e)}")
+        return {}
+
+    results = {}
+    for category_key, category in game["categories"].items():
+        leaderboard = leaderboards.get(category["id"])
+        narrowed = category_leaderboard(game, category, leaderboard) if leaderboard is not None else None
+        if narrowed is None:
+            continue
+        try:
+            record = build_record(game, category_key, narrowed)
+        except (KeyError, IndexError) as e:
+            logger.error(f"Data parsing error: {str(e)}")
+            continue
+        # Single-category lookups share the result
+        record_cache.set(("records", game_key, category_key), record)
+        results[category_key] = record
+    return results
+
+@cached_record("leaderboard_index")
+def get_leaderboard_index(game_id, category_id):
+    """
+    Download a category's full leaderboard and index it by variable values
+
+    Args:
+        game_id (str): speedrun.com game ID
+        category_id (str): speedrun.com category ID
+
+    Returns:
+        LeaderboardIndex: The indexed leaderboard
+
+    Raises:
+        Exception: If there's an error fetching the data
+    """
+    api_url = full_leaderboard_url(game_id, category_id)
+    try:
+        logger.debug(f"Fetching data from: {api_url}")
+        response = upstream.get(api_url)
+        response.raise_for_status()
+        leaderboard = response.json()["data"]
+        remember_embedded_players(leaderboard.get("players", {}).get("data"))
+        return LeaderboardIndex(leaderboard)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error: {str(e)}")
+        raise Exception(f"Failed to connect to Speedrun.com API: {str(e)}")
+    except (KeyError, TypeError) as e:
+        logger.error(f"Data parsing error: {str(e)}")
+        raise Exception(f"Failed to parse speedrun data: {str(e)}")
+
+# Leaderboard indexes being downloaded in the background, by (game ID, category ID)
+_index_loads = set()
+_index_loads_lock = threading.Lock()
+
+def load_leaderboard_index_in_background(game_id, category_id):
+    """Start a background download of a category's leaderboard index unless one is already running."""
+    key = (game_id, category_id)
+    with _index_loads_lock:
+        if key in _index_loads:
+            return
+        _index_loads.add(key)
+
+    def load():
+        try:
+            get_leaderboard_index.refresh(game_id, category_id)
+        except Exception as e:
+            logger.error(f"Error loading leaderboard index {game_id}/{category_id}: {str(e)}")
+        finally:
+            with _index_loads_lock:
+                _index_loads.discard(key)
+
+    threading.Thread(target=load, daemon=True).start()
+
+def cached_leaderboard_index(game_id, category_id):
+    """
+    Get a category's leaderboard index without waiting on speedrun.com
+
+    A missing or expired index is downloaded in the background; an expired
+    one is still returned in the meantime.
+
+    Returns:
+        tuple: (LeaderboardIndex, or None if none is loaded yet; True if the
+        index has not expired)
+    """
+    cached = record_cache.peek(("leaderboard_index", game_id, category_id))
+    if cached is None or not cached[1]:
+        load_leaderboard_index_in_background(game_id, category_id)
+    return cached or (None, False)
+
+def records_from_leaderboard_indexes(game_key, refresh=False):
+    """
+    Build records for every category of a game from full leaderboard indexes
+
+    Each speedrun.com category is downloaded once however many of our
+    category keys are subcategories of it. Categories whose leaderboard
+    failed to load are left out, so the caller can retry them one by one.
+
+    Args:
+        game_key (str): The game key from the registry
+        refresh (bool): Skip the record cache and fetch from upstream
+
+    Returns:
+        dict: Category keys to record data
+    """
+    game = get_game(game_key)
+    lookup = get_leaderboard_index.refresh if refresh else get_leaderboard_index
+    category_ids = sorted({category["id"] for category in game["categories"].values()})
+
+    def fetch(category_id):
+        return lookup(game["game_id"], category_id)
+
+    indexes = {}
+    for category_id, index, error in upstream.fetch_concurrently(category_ids, fetch):
+        if error is not None:
+            logger.error(f"Error fetching {game_key} leaderboard {category_id}: {str(error)}")
+            continue
+        indexes[category_id] = index
+
+    results = {}
+    for category_key, category in game["categories"].items():
+        index = indexes.get(category["id"])
+        if index is None:
+            continue
+        record = build_record(game, category_key, index.top(category_filters(game, category)))
+        # Single-category lookups share the result
+        record_cache.set(("records", game_key, category_key), record)
+        results[category_key] = record
+    return results
+
+def get_category_top(game_key, category_key, n=10, variables=None):
+    """
+    Get the best runs of a category from its cached full leaderboard index
+
+    Never waits on speedrun.com; see cached_leaderboard_index.
+
+    Args:
+        game_key (str): The game key from the registry
+        category_key (str): The category key within the game
+        n (int): Number of runs to return
+        variables (list): {"id", "value"} filters selecting the subcategory;
+            defaults to the category's own filters
+
+    Returns:
+        tuple: (run data with place, times, runner and date, or None if the
+        index is not loaded yet; True if the index has not expired), or None
+        if the game or category is not found
+    """
+    game = get_game(game_key)
+    if game is None or category_key not in game["categories"]:
+        logger.error(f"Unknown category key: {game_key}/{category_key}")
+        return None
+
+    category = game["categories"][category_key]
+    if variables is None:
+        variables = category_filters(game, category)
+    index, fresh = cached_leaderboard_index(game["game_id"], category["id"])
+    if index is None:
+        return None, False
+    leaderboard = index.top(variables, n)
+    runs = [dict(place=entry["place"], **run_fields(game, entry["run"], leaderboard))
+            for entry in leaderboard["runs"]]
+    return runs, fresh
+
+# Fetch strategies that answer a whole game in fewer requests than one per category
+BULK_FETCHERS = {
+    "game": records_from_game_leaderboards,
+    "leaderboard": records_from_leaderboard_indexes,
+}
+
+def get_all_categories(game_key, refresh=False):
+    """
+    Fetch world records for every category of a registered game
+
+    In game and leaderboard modes categories are answered from bulk
+    requests where possible; the rest fall back to per-category requests.
+
+    Args:
+        game_key (str): The game key from the registry
+        refresh (bool): Skip the record cache and fetch from upstream
+
+    Returns:
+        dict: Dictionary with category keys and their record data; categories
+        that failed to load map to None
+    """
+    game = get_game(game_key)
+    if game is None:
+        logger.error(f"Unknown game key: {game_key}")
+        return {}
+
+    bulk_fetcher = BULK_FETCHERS.get(RECORDS_FETCH_MODE)
+    bulk = bulk_fetcher(game_key, refresh) if bulk_fetcher else {}
+    remaining = [category_key for category_key in game["categories"] if category_key not in bulk]
+    lookup = get_category_record.refresh if refresh else get_category_record
+
+    def fetch(category_key):
+        return lookup(game_key, category_key)
+
+    results = dict(bulk)
+    for category_key, record, error in upstream.fetch_concurrently(remaining, fetch):
+        if error is not None:
+            logger.error(f"Error fetching {game_key}/{category_key} category: {str(error)}")
+        results[category_key] = record
+
+    return {category_key: results.get(category_key) for category_key in game["categories"]}
+
+def get_all_games():
+    """
+    Fetch world records for every registered game
+
+    Returns:
+        dict: Game key to that game's get_all_categories result
+    """
+    return {game_key: get_all_categories(game_key) for game_key in GAMES}
@@ -0,0 +1,234 @@
+"""
+Long-lived runner ID to display name cache shared by every game module.
+"""
+import os
+import json
+import logging
+import threading
+import tempfile
+import time
+from collections import OrderedDict
+
+import upstream
+from store import record_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+RUNNER_CACHE_PATH = os.environ.get(
+    "RUNNER_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "runners.json"))
+RUNNER_CACHE_MAX_ENTRIES = int(os.environ.get("RUNNER_CACHE_MAX_ENTRIES", "1000"))
+RUNNER_CACHE_REFRESH_AFTER = float(os.environ.get("RUNNER_CACHE_REFRESH_AFTER", str(7 * 24 * 3600)))  # seconds
+
+USERS_API_URL = "https://www.speedrun.com/api/v1/users"
+
+
+def fetch_runner_name(runner_id):
+    """
+    Fetch a runner's international name from speedrun.com
+
+    Args:
+        runner_id (str): speedrun.com user ID
+
+    Returns:
+        str: Runner name
+    """
+    runner_data = upstream.get(f"{USERS_API_URL}/{runner_id}").json()
+    return runner_data["data"]["names"]["international"]
+
+
+class RunnerNameCache:
+    """
+    Runner names keyed by user ID, persisted to a JSON file and shared with
+    other workers through the record store.
+
+    Entries older than refresh_after are still returned, and a background
+    refresh is started for them. When the cache is full, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path=RUNNER_CACHE_PATH, max_entries=RUNNER_CACHE_MAX_ENTRIES,
+                 refresh_after=RUNNER_CACHE_REFRESH_AFTER, fetcher=fetch_runner_name, store=record_store):
+        self.path = path
+        self.store = store
+        self.max_entries = max_entries
+        self.refresh_after = refresh_after
+        self.fetcher = fetcher
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load persisted entries from disk, ignoring a missing or corrupt file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            for runner_id, entry in stored.items():
+                self._entries[runner_id] = (entry["name"], entry["fetched_at"])
+            logger.info(f"Loaded {len(self._entries)} cached runner names from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading runner cache: {str(e)}")
+
+    def _save(self):
+        """Write entries to disk atomically."""
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                stored = {runner_id: {"name": name, "fetched_at": fetched_at}
+                          for runner_id, (name, fetched_at) in self._entries.items()}
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            # A temp file per write, so concurrent saves never share one
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix=".tmp", delete=False) as f:
+                json.dump(stored, f)
+            os.replace(f.name, self.path)
+        except Exception as e:
+            logger.error(f"Error saving runner cache: {str(e)}")
+
+    def _remember(self, runner_id, name, fetched_at):
+        """Add an entry in memory, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[runner_id] = (name, fetched_at)
+            self._entries.move_to_end(runner_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, runner_id, name):
+        """Store a runner name, evicting the least recently used entries if full."""
+        self.put_many({runner_id: name})
+
+    def put_many(self, names):
+        """
+        Store several runner names with one file write and one store transaction
+
+        Args:
+            names (dict): speedrun.com user IDs to runner names
+        """
+        now = time.time()
+        changed = {}
+        with self._lock:
+            for runner_id, name in names.items():
+                previous = self._entries.get(runner_id)
+                if previous is not None and previous[0] == name and now - previous[1] < self.refresh_after / 2:
+                    # Nothing worth persisting changed
+                    self._entries.move_to_end(runner_id)
+                else:
+                    changed[runner_id] = name
+        if not changed:
+            return
+        for runner_id, name in changed.items():
+            self._remember(runner_id, name, now)
+        self._save()
+        if self.store is not None:
+            self.store.put_runners(changed, now)
+
+    def get(self, runner_id):
+        """
+        Get a runner name, fetching it on a miss
+
+        Args:
+            runner_id (str): speedrun.com user ID
+
+        Returns:
+            str: Runner name
+
+        Raises:
+            Exception: If the name is not cached and the fetch fails
+        """
+        with self._lock:
+            entry = self._entries.get(runner_id)
+            if entry is not None:
+                self._entries.move_to_end(runner_id)
+
+        if entry is None and self.store is not None:
+            # Another worker may already have looked this runner up
+            entry = self.store.get_runner(runner_id)
+            if entry is not None:
+                self._remember(runner_id, *entry)
+
+        if entry is None:
+            name = self.fetcher(runner_id)
+            self.put(runner_id, name)
+            return name
+
+        name, fetched_at = entry
+        if time.time() - fetched_at > self.refresh_after:
+            self._refresh_in_background(runner_id)
+        return name
+
+    def _refresh_in_background(self, runner_id):
+        """Start a background fetch for a stale entry unless one is already running."""
+        with self._lock:
+            if runner_id in self._refreshing:
+                return
+            self._refreshing.add(runner_id)
+
+        def refresh():
+            try:
+                self.put(runner_id, self.fetcher(runner_id))
+            except Exception as e:
+                logger.error(f"Error refreshing runner {runner_id}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(runner_id)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def stats(self):
+        """Return current size and configuration."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "refresh_after": self.refresh_after,
+                "refreshing": len(self._refreshing)
+            }
+
+
+# One store shared by every game module
+runner_names = RunnerNameCache()
+
+
+def remember_embedded_players(embedded_players):
+    """
+    Store the names of the users in an embed=players payload
+
+    Called once per fetched payload, so a leaderboard with many new runners
+    costs one cache file write and one store transaction.
+
+    Args:
+        embedded_players (list): A leaderboard's players["data"] list
+    """
+    names = {}
+    for player in embedded_players or []:
+        name = player.get("names", {}).get("international")
+        if player.get("rel") != "guest" and player.get("id") and name:
+            names[player["id"]] = name
+    if names:
+        runner_names.put_many(names)
+
+
+def embedded_runner_name(player_ref, embedded_players):
+    """
+    Resolve a run's player reference against an embed=players payload
+
+    Args:
+        player_ref (dict): Entry from a run's "players" list
+        embedded_players (list): The leaderboard's players["data"] list
+
+    Returns:
+        str: Runner name, or None if the payload does not contain the player
+    """
+    if player_ref.get("rel") == "guest":
+        return player_ref.get("name")
+
+    runner_id = player_ref.get("id")
+    for player in embedded_players or []:
+        if runner_id and player.get("id") == runner_id:
+            return player.get("names", {}).get("international")
+    return None
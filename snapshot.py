@@ -0,0 +1,396 @@
+"""
+Background-refreshed, in-memory snapshot of every game's world records.
+
+API routes read from the snapshot so they never wait on speedrun.com.
+Refreshed records are written to the shared record store, so gunicorn
+workers reuse each other's refreshes instead of each calling upstream.
+Reads follow stale-while-revalidate: once a game's records are older than
+SNAPSHOT_STALE_AFTER they are still served, and a background refresh is
+started. Records older than SNAPSHOT_MAX_STALE are no longer served.
+
+The snapshot is written atomically to SNAPSHOT_PATH after every refresh
+and loaded from it when the process starts, so a cold start serves the
+last known records at once instead of waiting on speedrun.com.
+"""
+import os
+import json
+import logging
+import threading
+import tempfile
+import time
+
+import delta_sync
+from discovery import discovery_cache
+from games import GAMES
+from store import record_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_REFRESH_INTERVAL = float(os.environ.get("SNAPSHOT_REFRESH_INTERVAL", "300"))  # seconds
+SNAPSHOT_STARTUP_WAIT = float(os.environ.get("SNAPSHOT_STARTUP_WAIT", "30"))  # seconds
+SNAPSHOT_STALE_AFTER = float(os.environ.get("SNAPSHOT_STALE_AFTER", str(SNAPSHOT_REFRESH_INTERVAL * 2)))  # seconds
+SNAPSHOT_MAX_STALE = float(os.environ.get("SNAPSHOT_MAX_STALE", "86400"))  # seconds
+SNAPSHOT_RETRY_AFTER = float(os.environ.get("SNAPSHOT_RETRY_AFTER", "60"))  # seconds
+SNAPSHOT_REFRESH_LEASE = float(os.environ.get("SNAPSHOT_REFRESH_LEASE", "120"))  # seconds
+SNAPSHOT_PATH = os.environ.get(
+    "SNAPSHOT_PATH", os.path.join(os.path.dirname(__file__), "cache", "snapshot.json"))
+# Bump when the layout of the snapshot file changes; older files are ignored
+SNAPSHOT_FILE_VERSION = 1
+
+# Freshness of the records returned by RecordSnapshot.get
+FRESH = "fresh"
+STALE = "stale"
+REVALIDATING = "revalidating"
+
+
+class RecordSnapshot:
+    """
+    Latest records of every registered game.
+
+    Each game is refreshed as a unit and replaced atomically, so readers
+    always see a consistent set of categories.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self._games = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+        self._first_pass_done = False
+        self._refreshing = set()
+        self._failed_at = {}
+        self._thread = None
+        self.started_at = time.time()
+        self.warm_start()
+
+    def warm_start(self):
+        """
+        Load the last persisted snapshot so the first requests are answered at once
+
+        Games missing from the snapshot file are read from the record store.
+        Neither source calls speedrun.com; games found in neither are loaded
+        by the first refresh.
+        """
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("version") != SNAPSHOT_FILE_VERSION:
+                    logger.warning(f"Ignoring snapshot file {self.path} with version {stored.get('version')}")
+                else:
+                    with self._lock:
+                        for game_key, entry in stored["games"].items():
+                            if game_key in GAMES:
+                                self._games[game_key] = entry
+                                self._sources[game_key] = "disk"
+            except Exception as e:
+                logger.error(f"Error loading snapshot file: {str(e)}")
+
+        for game_key in GAMES:
+            with self._lock:
+                loaded = game_key in self._games
+            if not loaded:
+                stored = record_store.load_game(game_key)
+                if stored is not None:
+                    with self._lock:
+                        self._games[game_key] = stored
+                        self._sources[game_key] = "store"
+        with self._lock:
+            logger.info(f"Warm start loaded {len(self._games)} of {len(GAMES)} games")
+
+    def _persist(self):
+        """Write the snapshot to disk atomically."""
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                body = json.dumps({"version": SNAPSHOT_FILE_VERSION, "saved_at": time.time(),
+                                   "games": self._games})
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            # A temp file per write, so concurrent saves never share one
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix=".tmp", delete=False) as f:
+                f.write(body)
+            os.replace(f.name, self.path)
+        except Exception as e:
+            logger.error(f"Error saving snapshot file: {str(e)}")
+
+    def _adopt(self, game_key, stored):
+        """Swap records loaded from the shared store into the snapshot."""
+        with self._lock:
+            self._games[game_key] = stored
+            self._sources[game_key] = "store"
+            self._failed_at.pop(game_key, None)
+            self._updated.notify_all()
+        self._persist()
+
+    def _wait_for_shared(self, game_key, newer_than):
+        """
+        Wait for the worker holding the refresh lease to store its records
+
+        Returns:
+            dict: The stored entry, or None if the lease ran out first
+        """
+        deadline = time.monotonic() + SNAPSHOT_REFRESH_LEASE
+        while time.monotonic() < deadline:
+            time.sleep(1)
+            stored = record_store.load_game(game_key)
+            if stored is not None and stored["refreshed_at"] > newer_than:
+                return stored
+        return None
+
+    def refresh_game(self, game_key, full=False):
+        """
+        Bring a game's records up to date and swap them into the snapshot
+
+        Records another worker stored within the refresh interval are reused;
+        records this process stored itself are only reused if they are newer
+        than its snapshot, so a worker never skips its own next refresh.
+        Otherwise only the worker holding the game's refresh lease syncs with
+        upstream; the others wait for its results. Categories that fail to
+        load keep their previous record.
+
+        Args:
+            game_key (str): The game key from the registry
+            full (bool): Re-fetch every category instead of syncing newly
+                verified runs, even if fresh records are stored
+
+        Raises:
+            Exception: If no category could be fetched
+        """
+        newer_than = time.time() - SNAPSHOT_REFRESH_INTERVAL
+        stored = record_store.load_game(game_key)
+        if stored is not None:
+            with self._lock:
+                loaded = game_key in self._games
+                own_refreshed_at = self._games.get(game_key, {}).get("refreshed_at")
+            reusable = (stored.get("holder") != record_store.holder
+                        or own_refreshed_at is None or stored["refreshed_at"] > own_refreshed_at)
+            if stored["refreshed_at"] > newer_than and reusable and not full:
+                self._adopt(game_key, stored)
+                return
+            if not loaded:
+                # Serve the older stored records while this refresh runs
+                self._adopt(game_key, stored)
+
+        if not record_store.claim_refresh(game_key, SNAPSHOT_REFRESH_LEASE):
+            shared = self._wait_for_shared(game_key, newer_than)
+            if shared is not None:
+                self._adopt(game_key, shared)
+                return
+            logger.warning(f"{game_key} refresh lease expired without new records, refreshing here")
+
+        try:
+            try:
+                with self._lock:
+                    current = self._games.get(game_key, {}).get("records")
+                fresh = delta_sync.sync_game(game_key, current, full)
+                if fresh and all(record is None for record in fresh.values()):
+                    raise Exception(f"Every {game_key} category failed to load")
+            except Exception:
+                with self._lock:
+                    self._failed_at[game_key] = time.time()
+                raise
+
+            with self._lock:
+                previous_entry = self._games.get(game_key, {})
+                previous = previous_entry.get("records", {})
+                merged = {k: v if v is not None else previous.get(k) for k, v in fresh.items()}
+                now = time.time()
+                changed_at = previous_entry["changed_at"] if merged == previous else now
+                self._games[game_key] = {"records": merged, "refreshed_at": now, "changed_at": changed_at}
+                self._sources[game_key] = "upstream"
+                self._failed_at.pop(game_key, None)
+                self._updated.notify_all()
+            self._persist()
+            record_store.save_game(game_key, merged, now, changed_at)
+            record_store.append_history(game_key, fresh, now)
+        finally:
+            record_store.release_refresh(game_key)
+
+    def _refresh_tracked(self, game_key):
+        """Refresh a game and clear its in-progress marker afterwards."""
+        try:
+            self.refresh_game(game_key)
+        except Exception as e:
+            logger.error(f"Error refreshing {game_key} snapshot: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(game_key)
+
+    def _claim_refresh(self, game_key, respect_backoff):
+        """
+        Mark a game as refreshing unless a refresh is already running
+
+        Returns:
+            tuple: (REVALIDATING or STALE, whether the caller should run the
+            refresh); STALE means a recent failure is still inside its
+            retry window
+        """
+        with self._lock:
+            if game_key in self._refreshing:
+                return REVALIDATING, False
+            failed_at = self._failed_at.get(game_key)
+            if respect_backoff and failed_at and time.time() - failed_at < SNAPSHOT_RETRY_AFTER:
+                return STALE, False
+            self._refreshing.add(game_key)
+            return REVALIDATING, True
+
+    def revalidate(self, game_key):
+        """
+        Start a background refresh of one game
+
+        Returns:
+            str: REVALIDATING if a refresh is running, STALE if upstream failed
+            recently and the retry window has not passed yet
+        """
+        status, claimed = self._claim_refresh(game_key, respect_backoff=True)
+        if claimed:
+            threading.Thread(target=self._refresh_tracked, args=(game_key,), daemon=True).start()
+        return status
+
+    def refresh_all(self):
+        """Refresh every registered game, skipping games already being revalidated."""
+        for game_key in GAMES:
+            _, claimed = self._claim_refresh(game_key, respect_backoff=False)
+            if claimed:
+                self._refresh_tracked(game_key)
+        with self._lock:
+            self._first_pass_done = True
+            self._updated.notify_all()
+
+    def get(self, game_key, wait=SNAPSHOT_STARTUP_WAIT):
+        """
+        Read a game's records from the snapshot
+
+        Starts the refresher if needed and, until the game has been loaded
+        once, waits up to wait seconds for it. Stale records trigger a
+        background refresh; records older than SNAPSHOT_MAX_STALE are not
+        returned.
+
+        Args:
+            game_key (str): The game key from the registry
+            wait (float): Seconds to wait for the first refresh
+
+        Returns:
+            tuple: (records dict, age in seconds, freshness), with records and
+            age set to None if nothing servable is loaded
+        """
+        self.start()
+        with self._lock:
+            self._updated.wait_for(lambda: game_key in self._games or self._first_pass_done, timeout=wait)
+            entry = self._games.get(game_key)
+
+        if entry is None:
+            return None, None, self.revalidate(game_key)
+
+        age = time.time() - entry["refreshed_at"]
+        if age <= SNAPSHOT_STALE_AFTER:
+            return entry["records"], age, FRESH
+
+        status = self.revalidate(game_key)
+        if age > SNAPSHOT_MAX_STALE:
+            logger.warning(f"{game_key} snapshot is {age:.0f}s old, past the max-stale window")
+            return None, age, status
+        return entry["records"], age, status
+
+    def changed_at(self, game_key):
+        """
+        Get when a game's records last changed content
+
+        Returns:
+            float: Unix time, or None if the game has not been loaded
+        """
+        with self._lock:
+            return self._games.get(game_key, {}).get("changed_at")
+
+    def resync(self, game_key):
+        """
+        Re-fetch every category of a game now, e.g. after a record was rejected
+
+        Returns:
+            dict: The game's records after the resync
+        """
+        record_store.clear_sync_state(game_key)
+        self.refresh_game(game_key, full=True)
+        with self._lock:
+            return self._games.get(game_key, {}).get("records")
+
+    def readiness(self):
+        """
+        Report whether every game can be served from the snapshot
+
+        Returns:
+            tuple: (True if every game has records within SNAPSHOT_MAX_STALE,
+            details with the snapshot age and source per game)
+        """
+        # An instance that only receives probes must still load its records
+        self.start()
+        now = time.time()
+        with self._lock:
+            games = {
+                game_key: {
+                    "loaded": game_key in self._games,
+                    "age": round(now - self._games[game_key]["refreshed_at"], 3) if game_key in self._games else None,
+                    "source": self._sources.get(game_key)
+                }
+                for game_key in GAMES
+            }
+        ready = all(game["loaded"] and game["age"] <= SNAPSHOT_MAX_STALE for game in games.values())
+        ages = [game["age"] for game in games.values() if game["age"] is not None]
+        return ready, {
+            "ready": ready,
+            "uptime": round(now - self.started_at, 3),
+            "oldest_age": max(ages) if ages else None,
+            "games": games
+        }
+
+    def status(self):
+        """Return refresh time, age, refresh state and sync position per game."""
+        now = time.time()
+        with self._lock:
+            status = {
+                game_key: {
+                    "refreshed_at": entry["refreshed_at"],
+                    "age": round(now - entry["refreshed_at"], 3),
+                    "changed_at": entry["changed_at"],
+                    "refreshing": game_key in self._refreshing,
+                    "last_failure": self._failed_at.get(game_key)
+                }
+                for game_key, entry in self._games.items()
+            }
+        for game_key, game_status in status.items():
+            game_status["sync"] = record_store.sync_state(game_key)
+        return status
+
+    def _run(self):
+        """Refresh loop run by the background thread."""
+        logger.info(f"Snapshot refresher starting - will run every {SNAPSHOT_REFRESH_INTERVAL:.0f} seconds")
+        while True:
+            started = time.monotonic()
+            self.refresh_all()
+            # Category discovery only calls upstream once its cache is due
+            discovery_cache.refresh_due()
+            time.sleep(max(0.0, SNAPSHOT_REFRESH_INTERVAL - (time.monotonic() - started)))
+
+    def start(self):
+        """Start the background refresh thread once per process."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info("Snapshot refresh thread started")
+
+
+# One snapshot per process
+record_snapshot = RecordSnapshot()
+
+
+def start_refresh_thread():
+    """Start the background thread that keeps the record snapshot current."""
+    record_snapshot.start()
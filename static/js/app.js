@@ -43,6 +43,10 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Records inlined by the server from its warm snapshot, if it had any
+    const initialRecordsEl = document.getElementById('initial-records');
+    const initialRecords = initialRecordsEl ? JSON.parse(initialRecordsEl.textContent) : null;
+
     // Function to fetch world record data for a specific category
     async function fetchCategoryRecord(categoryKey) {
         // Update current category
@@ -53,7 +57,12 @@ document.addEventListener('DOMContentLoaded', function() {
         recordDataEl.classList.add('d-none');
         errorMessageEl.classList.add('d-none');
         
-        const data = await getCategoryRecord(categoryKey);
+        showCategoryRecord(categoryKey, await getCategoryRecord(categoryKey));
+    }
+
+    // Function to display the world record of a category
+    function showCategoryRecord(categoryKey, data) {
+        currentCategory = categoryKey;
         if (data) {
             // Update the UI with the data
             categoryTitleEl.innerHTML = `<i class="fas fa-trophy me-2"></i>${data.category} World Record`;
@@ -95,60 +104,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 return response.json();
             })
-            .then(data => {
-                // Clear loading row
-                allCategoriesTableEl.innerHTML = '';
-                
-                // Sort categories by time (fastest first)
-                const sortedCategories = Object.keys(data)
-                    .filter(key => data[key] !== null)
-                    .sort((a, b) => {
-                        if (!data[a] || !data[b]) return 0;
-                        return data[a].raw_time - data[b].raw_time;
-                    });
-                
-                // Add rows for each category
-                sortedCategories.forEach(key => {
-                    const record = data[key];
-                    if (record) {
-                        const row = document.createElement('tr');
-                        row.classList.add('category-row');
-                        row.dataset.category = key;
-                        
-                        row.innerHTML = `
-                            <td>
-                                <strong>${record.category}</strong>
-                                ${key === currentCategory ? '<span class="badge bg-danger ms-2">Selected</span>' : ''}
-                            </td>
-                            <td class="text-monospace">${record.detailed_time}</td>
-                            <td>${record.runner}</td>
-                            <td>${record.date}</td>
-                        `;
-                        
-                        // Add click event to row
-                        row.addEventListener('click', () => {
-                            document.getElementById(`btn-${key}`).checked = true;
-                            fetchCategoryRecord(key);
-                            
-                            // Update selected badge
-                            document.querySelectorAll('.category-row').forEach(r => {
-                                const badge = r.querySelector('.badge');
-                                if (badge) badge.remove();
-                                
-                                if (r.dataset.category === key) {
-                                    const catCell = r.querySelector('td:first-child');
-                                    const newBadge = document.createElement('span');
-                                    newBadge.className = 'badge bg-danger ms-2';
-                                    newBadge.textContent = 'Selected';
-                                    catCell.appendChild(newBadge);
-                                }
-                            });
-                        });
-                        
-                        allCategoriesTableEl.appendChild(row);
-                    }
-                });
-            })
+            .then(showAllCategories)
             .catch(error => {
                 console.error('Error fetching all categories:', error);
                 allCategoriesTableEl.innerHTML = `
@@ -161,6 +117,62 @@ document.addEventListener('DOMContentLoaded', function() {
                 `;
             });
     }
+
+    // Function to fill the all categories table
+    function showAllCategories(data) {
+        // Clear loading row
+        allCategoriesTableEl.innerHTML = '';
+        
+        // Sort categories by time (fastest first)
+        const sortedCategories = Object.keys(data)
+            .filter(key => data[key] !== null)
+            .sort((a, b) => {
+                if (!data[a] || !data[b]) return 0;
+                return data[a].raw_time - data[b].raw_time;
+            });
+        
+        // Add rows for each category
+        sortedCategories.forEach(key => {
+            const record = data[key];
+            if (record) {
+                const row = document.createElement('tr');
+                row.classList.add('category-row');
+                row.dataset.category = key;
+                
+                row.innerHTML = `
+                    <td>
+                        <strong>${record.category}</strong>
+                        ${key === currentCategory ? '<span class="badge bg-danger ms-2">Selected</span>' : ''}
+                    </td>
+                    <td class="text-monospace">${record.detailed_time}</td>
+                    <td>${record.runner}</td>
+                    <td>${record.date}</td>
+                `;
+                
+                // Add click event to row
+                row.addEventListener('click', () => {
+                    document.getElementById(`btn-${key}`).checked = true;
+                    fetchCategoryRecord(key);
+                    
+                    // Update selected badge
+                    document.querySelectorAll('.category-row').forEach(r => {
+                        const badge = r.querySelector('.badge');
+                        if (badge) badge.remove();
+                        
+                        if (r.dataset.category === key) {
+                            const catCell = r.querySelector('td:first-child');
+                            const newBadge = document.createElement('span');
+                            newBadge.className = 'badge bg-danger ms-2';
+                            newBadge.textContent = 'Selected';
+                            catCell.appendChild(newBadge);
+                        }
+                    });
+                });
+                
+                allCategoriesTableEl.appendChild(row);
+            }
+        });
+    }
     
     // Set up category button handlers
     document.querySelectorAll('input[name="category"]').forEach(radio => {
@@ -189,7 +201,15 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 1000);
     });
     
-    // Fetch data on page load
-    fetchCategoryRecord('any%');
-    fetchAllCategories();
+    // Show the inlined records on page load, fetching only what the server did not send
+    if (initialRecords && initialRecords['any%']) {
+        showCategoryRecord('any%', initialRecords['any%']);
+    } else {
+        fetchCategoryRecord('any%');
+    }
+    if (initialRecords) {
+        showAllCategories(initialRecords);
+    } else {
+        fetchAllCategories();
+    }
 });
\ No newline at end of file
@@ -0,0 +1,603 @@
+"""
+Persistent record store shared by every worker process.
+
+Holds each game's current records, their history and sync position, runner
+names, export metadata and background jobs in a SQL database, so gunicorn workers share
+one upstream refresh instead of each doing their own. SQLite is used by
+default; point RECORD_STORE_URL at Postgres (postgresql+psycopg2://...) to
+share the store across hosts.
+"""
+import os
+import json
+import logging
+import threading
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RECORD_STORE_URL = os.environ.get(
+    "RECORD_STORE_URL",
+    f"sqlite:///{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'speedrun.db')}")
+# A held job key can free up while we look at it; retry the claim this many times
+JOB_CLAIM_ATTEMPTS = 3
+
+metadata = sa.MetaData()
+
+game_records = sa.Table(
+    "game_records", metadata,
+    sa.Column("game_key", sa.String(64), primary_key=True),
+    sa.Column("records", sa.Text, nullable=False),
+    sa.Column("refreshed_at", sa.Float, nullable=False),
+    sa.Column("changed_at", sa.Float, nullable=False),
+    # Store holder of the process that wrote the records
+    sa.Column("holder", sa.String(128)),
+)
+
+refresh_leases = sa.Table(
+    "refresh_leases", metadata,
+    sa.Column("game_key", sa.String(64), primary_key=True),
+    sa.Column("holder", sa.String(128), nullable=False),
+    sa.Column("expires_at", sa.Float, nullable=False),
+)
+
+runner_names = sa.Table(
+    "runner_names", metadata,
+    sa.Column("runner_id", sa.String(64), primary_key=True),
+    sa.Column("name", sa.String(255), nullable=False),
+    sa.Column("fetched_at", sa.Float, nullable=False),
+)
+
+latest_exports = sa.Table(
+    "latest_exports", metadata,
+    sa.Column("game_key", sa.String(64), primary_key=True),
+    sa.Column("file_path", sa.Text, nullable=False),
+    sa.Column("created_at", sa.Float, nullable=False),
+)
+
+export_fingerprints = sa.Table(
+    "export_fingerprints", metadata,
+    sa.Column("game_key", sa.String(64), primary_key=True),
+    sa.Column("fingerprint", sa.String(64), nullable=False),
+    sa.Column("records", sa.Text, nullable=False),
+    sa.Column("exported_at", sa.Float, nullable=False),
+)
+
+sync_state = sa.Table(
+    "sync_state", metadata,
+    sa.Column("game_key", sa.String(64), primary_key=True),
+    # Verify time of the newest run already applied to the game's records
+    sa.Column("high_water_mark", sa.Float, nullable=False),
+    sa.Column("full_synced_at", sa.Float, nullable=False),
+    sa.Column("synced_at", sa.Float, nullable=False),
+)
+
+jobs = sa.Table(
+    "jobs", metadata,
+    sa.Column("job_id", sa.String(32), primary_key=True),
+    sa.Column("job_key", sa.String(128), nullable=False),
+    sa.Column("status", sa.String(16), nullable=False),
+    sa.Column("created_at", sa.Float, nullable=False),
+    sa.Column("started_at", sa.Float),
+    sa.Column("finished_at", sa.Float),
+    sa.Column("result", sa.Text),
+    sa.Column("error", sa.Text),
+    sa.Index("ix_jobs_key_status", "job_key", "status"),
+)
+
+# One row per job key while a job for it is active; the primary key makes claiming a key atomic
+job_locks = sa.Table(
+    "job_locks", metadata,
+    sa.Column("job_key", sa.String(128), primary_key=True),
+    sa.Column("job_id", sa.String(32), nullable=False),
+    sa.Column("created_at", sa.Float, nullable=False),
+)
+
+record_history = sa.Table(
+    "record_history", metadata,
+    sa.Column("id", sa.BigInteger().with_variant(sa.Integer, "sqlite"), primary_key=True, autoincrement=True),
+    sa.Column("game_key", sa.String(64), nullable=False),
+    sa.Column("category_key", sa.String(64), nullable=False),
+    sa.Column("category_id", sa.String(64), nullable=False),
+    sa.Column("raw_time", sa.Float, nullable=False),
+    sa.Column("runner", sa.String(255), nullable=False),
+    sa.Column("run_date", sa.String(64), nullable=False),
+    sa.Column("fetched_at", sa.Float, nullable=False),
+    # True when the record differs from the previous row of the same category
+    sa.Column("changed", sa.Boolean, nullable=False),
+    sa.Index("ix_record_history_category", "game_key", "category_key", "changed", "fetched_at"),
+    sa.Index("ix_record_history_changes", "changed", "fetched_at"),
+)
+
+
+def _history_row(row):
+    """Turn a record_history row into an API-friendly dict."""
+    return {
+        "game_key": row.game_key,
+        "category_key": row.category_key,
+        "category_id": row.category_id,
+        "raw_time": row.raw_time,
+        "runner": row.runner,
+        "date": row.run_date,
+        "fetched_at": row.fetched_at
+    }
+
+
+def _job_row(row):
+    """Turn a jobs row into an API-friendly dict."""
+    return {
+        "job_id": row.job_id,
+        "key": row.job_key,
+        "status": row.status,
+        "created_at": row.created_at,
+        "started_at": row.started_at,
+        "finished_at": row.finished_at,
+        "result": json.loads(row.result) if row.result else None,
+        "error": row.error
+    }
+
+
+def _add_missing_columns(engine):
+    """Add nullable columns introduced after a table was first created."""
+    inspector = sa.inspect(engine)
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(sa.text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    logger.info(f"Added column {table.name}.{column.name} to the record store")
+
+
+def _upsert(connection, table, key_column, values):
+    """Update a row by primary key, inserting it if it does not exist yet."""
+    key = values[key_column]
+    updated = connection.execute(
+        table.update().where(table.c[key_column] == key).values(**values)).rowcount
+    if not updated:
+        connection.execute(table.insert().values(**values))
+
+
+class RecordStore:
+    """
+    SQL-backed store for records, record history, runner names and export metadata.
+
+    The schema is created on first use. Every method logs and swallows
+    database errors, so a broken store degrades to per-process behaviour
+    instead of taking the app down.
+    """
+
+    def __init__(self, url=RECORD_STORE_URL):
+        self.url = url
+        self.holder = f"{os.getpid()}-{id(self)}"
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        """Create the engine and schema on first use."""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    if self.url.startswith("sqlite:///"):
+                        os.makedirs(os.path.dirname(self.url[len("sqlite:///"):]) or ".", exist_ok=True)
+                        engine = sa.create_engine(self.url, connect_args={"timeout": 30})
+                    else:
+                        engine = sa.create_engine(self.url, pool_pre_ping=True)
+                    metadata.create_all(engine)
+                    _add_missing_columns(engine)
+                    self._engine = engine
+        return self._engine
+
+    def load_game(self, game_key):
+        """
+        Read a game's stored records
+
+        Returns:
+            dict: {"records", "refreshed_at", "changed_at", "holder"}, or None
+            if the game has not been stored or the store is unavailable
+        """
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(
+                    sa.select(game_records).where(game_records.c.game_key == game_key)).first()
+        except Exception as e:
+            logger.error(f"Error loading {game_key} records from store: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return {"records": json.loads(row.records), "refreshed_at": row.refreshed_at, "changed_at": row.changed_at,
+                "holder": row.holder}
+
+    def save_game(self, game_key, records, refreshed_at, changed_at):
+        """Store a game's records, when they were refreshed and last changed, and that this process wrote them."""
+        try:
+            with self.engine.begin() as connection:
+                _upsert(connection, game_records, "game_key", {
+                    "game_key": game_key,
+                    "records": json.dumps(records),
+                    "refreshed_at": refreshed_at,
+                    "changed_at": changed_at,
+                    "holder": self.holder
+                })
+        except Exception as e:
+            logger.error(f"Error saving {game_key} records to store: {str(e)}")
+
+    def claim_refresh(self, game_key, lease_seconds):
+        """
+        Take the cross-worker refresh lease for a game
+
+        Args:
+            game_key (str): The game key from the registry
+            lease_seconds (float): How long the lease lasts if never released
+
+        Returns:
+            bool: True if this process should refresh the game; also True if
+            the store is unavailable, so refreshes never stop entirely
+        """
+        now = time.time()
+        try:
+            with self.engine.begin() as connection:
+                claimed = connection.execute(
+                    refresh_leases.update()
+                    .where(refresh_leases.c.game_key == game_key)
+                    .where(sa.or_(refresh_leases.c.expires_at < now, refresh_leases.c.holder == self.holder))
+                    .values(holder=self.holder, expires_at=now + lease_seconds)).rowcount
+                if claimed:
+                    return True
+                exists = connection.execute(
+                    sa.select(refresh_leases.c.game_key).where(refresh_leases.c.game_key == game_key)).first()
+                if exists is not None:
+                    return False
+                connection.execute(refresh_leases.insert().values(
+                    game_key=game_key, holder=self.holder, expires_at=now + lease_seconds))
+                return True
+        except IntegrityError:
+            # Another worker inserted the lease first
+            return False
+        except Exception as e:
+            logger.error(f"Error claiming {game_key} refresh lease: {str(e)}")
+            return True
+
+    def release_refresh(self, game_key):
+        """Give up the refresh lease for a game if this process holds it."""
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    refresh_leases.update()
+                    .where(refresh_leases.c.game_key == game_key)
+                    .where(refresh_leases.c.holder == self.holder)
+                    .values(expires_at=0))
+        except Exception as e:
+            logger.error(f"Error releasing {game_key} refresh lease: {str(e)}")
+
+    def get_runner(self, runner_id):
+        """
+        Read a stored runner name
+
+        Returns:
+            tuple: (name, fetched_at), or None if unknown
+        """
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(
+                    sa.select(runner_names).where(runner_names.c.runner_id == runner_id)).first()
+        except Exception as e:
+            logger.error(f"Error loading runner {runner_id} from store: {str(e)}")
+            return None
+        return (row.name, row.fetched_at) if row is not None else None
+
+    def put_runners(self, names, fetched_at):
+        """Store several runner names in one transaction."""
+        try:
+            with self.engine.begin() as connection:
+                for runner_id, name in names.items():
+                    _upsert(connection, runner_names, "runner_id",
+                            {"runner_id": runner_id, "name": name, "fetched_at": fetched_at})
+        except Exception as e:
+            logger.error(f"Error saving {len(names)} runners to store: {str(e)}")
+
+    def append_history(self, game_key, records, fetched_at):
+        """
+        Append one history row per category of a refresh
+
+        Args:
+            game_key (str): The game key from the registry
+            records (dict): Category keys to record data; None values are skipped
+            fetched_at (float): Unix time of the refresh
+        """
+        try:
+            with self.engine.begin() as connection:
+                rows = []
+                for category_key, record in records.items():
+                    if record is None:
+                        continue
+                    previous = connection.execute(
+                        sa.select(record_history.c.raw_time, record_history.c.runner, record_history.c.run_date)
+                        .where(record_history.c.game_key == game_key)
+                        .where(record_history.c.category_key == category_key)
+                        .where(record_history.c.changed == sa.true())
+                        .order_by(record_history.c.fetched_at.desc())
+                        .limit(1)).first()
+                    current = (record["raw_time"], record["runner"], record["date"])
+                    rows.append({
+                        "game_key": game_key,
+                        "category_key": category_key,
+                        "category_id": record["category_id"],
+                        "raw_time": record["raw_time"],
+                        "runner": record["runner"],
+                        "run_date": record["date"],
+                        "fetched_at": fetched_at,
+                        "changed": previous is None or tuple(previous) != current
+                    })
+                if rows:
+                    connection.execute(record_history.insert(), rows)
+        except Exception as e:
+            logger.error(f"Error appending {game_key} record history: {str(e)}")
+
+    def record_progression(self, game_key, category_key, since=None, until=None, limit=1000):
+        """
+        Get how a category's world record changed over a time range
+
+        The record already in effect at since is included as the first entry.
+
+        Args:
+            game_key (str): The game key from the registry
+            category_key (str): The category key within the game
+            since (float): Unix time the range starts at, or None for the start
+            until (float): Unix time the range ends at, or None for now
+            limit (int): Maximum number of changes returned
+
+        Returns:
+            list: History entries, oldest first
+        """
+        changes = (sa.select(record_history)
+                   .where(record_history.c.game_key == game_key)
+                   .where(record_history.c.category_key == category_key)
+                   .where(record_history.c.changed == sa.true()))
+        try:
+            with self.engine.connect() as connection:
+                entries = []
+                query = changes
+                if since is not None:
+                    in_effect = connection.execute(
+                        changes.where(record_history.c.fetched_at <= since)
+                        .order_by(record_history.c.fetched_at.desc()).limit(1)).first()
+                    if in_effect is not None:
+                        entries.append(_history_row(in_effect))
+                    query = query.where(record_history.c.fetched_at > since)
+                if until is not None:
+                    query = query.where(record_history.c.fetched_at <= until)
+                rows = connection.execute(query.order_by(record_history.c.fetched_at).limit(limit)).all()
+        except Exception as e:
+            logger.error(f"Error loading {game_key}/{category_key} record history: {str(e)}")
+            return []
+        return entries + [_history_row(row) for row in rows]
+
+    def changes_since(self, since, game_key=None, limit=1000):
+        """
+        Get every world record change after a point in time
+
+        Args:
+            since (float): Unix time to look after
+            game_key (str): Restrict to one game, or None for every game
+            limit (int): Maximum number of changes returned
+
+        Returns:
+            list: History entries, oldest first
+        """
+        query = (sa.select(record_history)
+                 .where(record_history.c.changed == sa.true())
+                 .where(record_history.c.fetched_at > since))
+        if game_key is not None:
+            query = query.where(record_history.c.game_key == game_key)
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(query.order_by(record_history.c.fetched_at).limit(limit)).all()
+        except Exception as e:
+            logger.error(f"Error loading record changes since {since}: {str(e)}")
+            return []
+        return [_history_row(row) for row in rows]
+
+    def create_job(self, job_id, job_key, active_statuses, active_after):
+        """
+        Record a new job unless an equivalent one is still active
+
+        Args:
+            job_id (str): ID for the new job
+            job_key (str): Identifies what the job does, for deduplication
+            active_statuses (tuple): Statuses that count as still active
+            active_after (float): Unix time; older active jobs are treated
+                as abandoned
+
+        Returns:
+            tuple: (job dict, True if it was created or False if an active
+            job with the same key was returned instead)
+
+        Raises:
+            Exception: If the store is unavailable
+        """
+        for _ in range(JOB_CLAIM_ATTEMPTS):
+            now = time.time()
+            try:
+                with self.engine.begin() as connection:
+                    # Free a key left behind by a job that finished or was abandoned
+                    active = sa.select(jobs.c.job_id).where(jobs.c.status.in_(active_statuses))
+                    connection.execute(
+                        job_locks.delete()
+                        .where(job_locks.c.job_key == job_key)
+                        .where(sa.or_(job_locks.c.created_at <= active_after, job_locks.c.job_id.not_in(active))))
+                    connection.execute(job_locks.insert().values(job_key=job_key, job_id=job_id, created_at=now))
+                    connection.execute(jobs.insert().values(
+                        job_id=job_id, job_key=job_key, status=active_statuses[0], created_at=now))
+                    row = connection.execute(sa.select(jobs).where(jobs.c.job_id == job_id)).first()
+                    return _job_row(row), True
+            except IntegrityError:
+                # Another worker holds the key
+                with self.engine.connect() as connection:
+                    existing = connection.execute(
+                        sa.select(jobs)
+                        .join(job_locks, job_locks.c.job_id == jobs.c.job_id)
+                        .where(job_locks.c.job_key == job_key)).first()
+                if existing is not None:
+                    return _job_row(existing), False
+                # Its job finished in the meantime; claim the key again
+        raise Exception(f"Could not claim job key {job_key}")
+
+    def update_job(self, job_id, status, **fields):
+        """Set a job's status plus any of started_at, finished_at, result and error."""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(jobs.update().where(jobs.c.job_id == job_id).values(status=status, **fields))
+        except Exception as e:
+            logger.error(f"Error updating job {job_id}: {str(e)}")
+
+    def release_job(self, job_id):
+        """Free a finished job's key, so the same work can be queued again."""
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(job_locks.delete().where(job_locks.c.job_id == job_id))
+        except Exception as e:
+            logger.error(f"Error releasing job {job_id}: {str(e)}")
+
+    def get_job(self, job_id):
+        """
+        Read a job
+
+        Returns:
+            dict: The job, or None if it does not exist
+        """
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(sa.select(jobs).where(jobs.c.job_id == job_id)).first()
+        except Exception as e:
+            logger.error(f"Error loading job {job_id}: {str(e)}")
+            return None
+        return _job_row(row) if row is not None else None
+
+    def recent_jobs(self, limit=20):
+        """Return the most recently created jobs, newest first."""
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    sa.select(jobs).order_by(jobs.c.created_at.desc()).limit(limit)).all()
+        except Exception as e:
+            logger.error(f"Error loading recent jobs: {str(e)}")
+            return []
+        return [_job_row(row) for row in rows]
+
+    def prune_jobs(self, finished_before):
+        """Delete finished jobs older than a Unix time."""
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(jobs.delete()
+                                   .where(jobs.c.finished_at.is_not(None))
+                                   .where(jobs.c.finished_at < finished_before))
+        except Exception as e:
+            logger.error(f"Error pruning jobs: {str(e)}")
+
+    def sync_state(self, game_key):
+        """
+        Get a game's incremental sync position
+
+        Returns:
+            dict: high_water_mark, full_synced_at and synced_at, or None if
+            the game has not been fully synced
+        """
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(
+                    sa.select(sync_state).where(sync_state.c.game_key == game_key)).first()
+        except Exception as e:
+            logger.error(f"Error loading {game_key} sync state: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return {"high_water_mark": row.high_water_mark, "full_synced_at": row.full_synced_at,
+                "synced_at": row.synced_at}
+
+    def save_sync_state(self, game_key, high_water_mark, full_synced_at):
+        """Record how far a game's records have been synced."""
+        try:
+            with self.engine.begin() as connection:
+                _upsert(connection, sync_state, "game_key", {
+                    "game_key": game_key,
+                    "high_water_mark": high_water_mark,
+                    "full_synced_at": full_synced_at,
+                    "synced_at": time.time()
+                })
+        except Exception as e:
+            logger.error(f"Error saving {game_key} sync state: {str(e)}")
+
+    def clear_sync_state(self, game_key):
+        """Forget a game's sync position so its next refresh is a full resync."""
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(sync_state.delete().where(sync_state.c.game_key == game_key))
+        except Exception as e:
+            logger.error(f"Error clearing {game_key} sync state: {str(e)}")
+
+    def set_latest_export(self, game_key, file_path):
+        """Record the newest export file of a game."""
+        try:
+            with self.engine.begin() as connection:
+                _upsert(connection, latest_exports, "game_key",
+                        {"game_key": game_key, "file_path": file_path, "created_at": time.time()})
+        except Exception as e:
+            logger.error(f"Error saving {game_key} export metadata: {str(e)}")
+
+    def export_fingerprint(self, game_key):
+        """
+        Get the fingerprint and normalised records of a game's last export
+
+        Returns:
+            tuple: (fingerprint, normalised records), or None if the game has
+            not been exported
+        """
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(
+                    sa.select(export_fingerprints).where(export_fingerprints.c.game_key == game_key)).first()
+        except Exception as e:
+            logger.error(f"Error loading {game_key} export fingerprint: {str(e)}")
+            return None
+        return (row.fingerprint, json.loads(row.records)) if row is not None else None
+
+    def save_export_fingerprint(self, game_key, fingerprint, normalized):
+        """Record what a game's last successful export contained."""
+        try:
+            with self.engine.begin() as connection:
+                _upsert(connection, export_fingerprints, "game_key", {
+                    "game_key": game_key,
+                    "fingerprint": fingerprint,
+                    "records": json.dumps(normalized),
+                    "exported_at": time.time()
+                })
+        except Exception as e:
+            logger.error(f"Error saving {game_key} export fingerprint: {str(e)}")
+
+    def latest_export(self, game_key):
+        """
+        Get the newest export file of a game
+
+        Returns:
+            str: File path, or None if nothing has been exported
+        """
+        try:
+            with self.engine.connect() as connection:
+                row = connection.execute(
+                    sa.select(latest_exports.c.file_path).where(latest_exports.c.game_key == game_key)).first()
+        except Exception as e:
+            logger.error(f"Error loading {game_key} export metadata: {str(e)}")
+            return None
+        return row.file_path if row is not None else None
+
+
+# One store per process, backed by the shared database
+record_store = RecordStore()
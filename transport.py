@@ -0,0 +1,185 @@
+"""
+Pluggable transports for speedrun.com requests.
+
+live   - talk to speedrun.com over the pooled session
+replay - serve recorded responses from a fixture directory, no network
+record - talk to speedrun.com and save every response into the fixture directory
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+UPSTREAM_MODE = os.environ.get("UPSTREAM_MODE", "live")
+FIXTURE_DIR = os.environ.get("FIXTURE_DIR", os.path.join(os.path.dirname(__file__), "fixtures"))
+FIXTURE_INDEX = "index.json"
+
+
+def fixture_key(url):
+    """
+    Normalise a URL into a fixture index key
+
+    Args:
+        url (str): Full request URL
+
+    Returns:
+        str: Path plus sorted query string, without scheme or host
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.path}?{query}" if query else parts.path
+
+
+def make_response(url, status_code, body):
+    """Build a requests.Response carrying a JSON body."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.headers["Content-Type"] = "application/json"
+    response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return response
+
+
+class LiveTransport:
+    """Sends requests to speedrun.com."""
+
+    # Live requests go through the rate limiter
+    paced = True
+
+    def __init__(self, session):
+        self.session = session
+
+    def get(self, url, **kwargs):
+        """Issue a GET request over the session."""
+        return self.session.get(url, **kwargs)
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses from a fixture directory.
+
+    The directory holds an index.json that maps fixture keys to files. A
+    key without a query string matches any query on that path, so one
+    recorded leaderboard can answer all of its filtered variants.
+    """
+
+    # Nothing leaves the process, so there is nothing to rate limit
+    paced = False
+
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+        self.index = self._load_index()
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        """Load the fixture index, or an empty one if the directory is new."""
+        index_path = os.path.join(self.fixture_dir, FIXTURE_INDEX)
+        if not os.path.exists(index_path):
+            return {}
+        with open(index_path, 'r') as f:
+            return json.load(f)
+
+    def lookup(self, url):
+        """
+        Find the fixture entry for a URL
+
+        Returns:
+            dict: The index entry, or None if nothing was recorded
+        """
+        key = fixture_key(url)
+        entry = self.index.get(key)
+        if entry is None:
+            entry = self.index.get(key.split("?", 1)[0])
+        return entry
+
+    def _read(self, filename):
+        """Read a fixture body once and keep it in memory."""
+        with self._lock:
+            body = self._bodies.get(filename)
+        if body is None:
+            with open(os.path.join(self.fixture_dir, filename), 'rb') as f:
+                body = f.read()
+            with self._lock:
+                self._bodies[filename] = body
+        return body
+
+    def get(self, url, **kwargs):
+        """Return the recorded response, or a 404 if none exists."""
+        entry = self.lookup(url)
+        if entry is None:
+            logger.debug(f"No fixture recorded for {url}")
+            return make_response(url, 404, {"status": 404, "message": "No fixture recorded for this request"})
+        return make_response(url, entry.get("status", 200), self._read(entry["file"]))
+
+
+class RecordingTransport(LiveTransport):
+    """Sends requests to speedrun.com and saves every response as a fixture."""
+
+    def __init__(self, session, fixture_dir=FIXTURE_DIR):
+        super().__init__(session)
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        """Issue a GET request and record its response."""
+        response = super().get(url, **kwargs)
+        try:
+            self.save(url, response)
+        except Exception as e:
+            logger.error(f"Error recording fixture for {url}: {str(e)}")
+        return response
+
+    def save(self, url, response):
+        """Write a response body to the fixture directory and index it."""
+        key = fixture_key(url)
+        filename = f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.json"
+        with self._lock:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            with open(os.path.join(self.fixture_dir, filename), 'wb') as f:
+                f.write(response.content)
+
+            index_path = os.path.join(self.fixture_dir, FIXTURE_INDEX)
+            index = {}
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as f:
+                    index = json.load(f)
+            index[key] = {"file": filename, "status": response.status_code}
+            tmp_path = f"{index_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, indent=4, sort_keys=True)
+            os.replace(tmp_path, index_path)
+        logger.debug(f"Recorded fixture {filename} for {key}")
+
+
+def create_transport(mode, session, fixture_dir=FIXTURE_DIR):
+    """
+    Build the transport for an upstream mode
+
+    Args:
+        mode (str): "live", "replay" or "record"
+        session (requests.Session): Session used for live traffic
+        fixture_dir (str): Directory holding recorded responses
+
+    Returns:
+        The transport
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode == "live":
+        return LiveTransport(session)
+    if mode == "replay":
+        logger.info(f"Replaying speedrun.com responses from {fixture_dir}")
+        return ReplayTransport(fixture_dir)
+    if mode == "record":
+        logger.info(f"Recording speedrun.com responses into {fixture_dir}")
+        return RecordingTransport(session, fixture_dir)
+    raise ValueError(f"Unknown UPSTREAM_MODE: {mode}")
@@ -0,0 +1,279 @@
+"""
+Shared HTTP access layer for speedrun.com and GitHub requests.
+"""
+import os
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from transport import UPSTREAM_MODE, create_transport
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upstream configuration
+SPEEDRUN_RATE_LIMIT = float(os.environ.get("SPEEDRUN_RATE_LIMIT", "1.5"))  # requests per second, process-wide
+SPEEDRUN_BURST = int(os.environ.get("SPEEDRUN_BURST", "5"))
+SPEEDRUN_MAX_WORKERS = int(os.environ.get("SPEEDRUN_MAX_WORKERS", "4"))
+SPEEDRUN_MAX_RETRIES = int(os.environ.get("SPEEDRUN_MAX_RETRIES", "3"))
+SPEEDRUN_BACKOFF_BASE = float(os.environ.get("SPEEDRUN_BACKOFF_BASE", "1.0"))  # seconds
+SPEEDRUN_BACKOFF_MAX = float(os.environ.get("SPEEDRUN_BACKOFF_MAX", "30.0"))  # seconds
+# Upper bound on a server-sent Retry-After, so a bogus value cannot stall a worker
+SPEEDRUN_RETRY_AFTER_MAX = float(os.environ.get("SPEEDRUN_RETRY_AFTER_MAX", "300"))  # seconds
+
+# Connection pooling and timeouts
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "20"))  # seconds
+SPEEDRUN_POOL_SIZE = int(os.environ.get("SPEEDRUN_POOL_SIZE", str(max(SPEEDRUN_MAX_WORKERS, 4))))
+GITHUB_POOL_SIZE = int(os.environ.get("GITHUB_POOL_SIZE", "2"))
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+# speedrun.com answers 420 when throttling, the rest of the web uses 429
+RETRY_STATUSES = {420, 429, 500, 502, 503, 504}
+RATE_LIMIT_STATUSES = {420, 429}
+
+
+class RateLimitError(requests.exceptions.RequestException):
+    """Raised when speedrun.com keeps throttling us after every retry."""
+
+
+class TokenBucket:
+    """
+    Process-wide token bucket.
+
+    Tokens refill at rate per second up to burst; each request takes one
+    token and waits if none is available.
+    """
+
+    def __init__(self, rate=SPEEDRUN_RATE_LIMIT, burst=SPEEDRUN_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take one token without waiting for it
+
+        Returns:
+            float: Seconds the caller must wait before using the token
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future token for this caller
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """
+        Take one token, sleeping until it is available
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class UpstreamStats:
+    """Counters for requests, retries and time spent waiting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.throttle_wait = 0.0
+        self.backoff_wait = 0.0
+
+    def add(self, **increments):
+        """Increment any of the counters."""
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        """Return the counters as a dict."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "throttle_wait_seconds": round(self.throttle_wait, 3),
+                "backoff_wait_seconds": round(self.backoff_wait, 3)
+            }
+
+
+def create_session(pool_size):
+    """
+    Build a keep-alive session with a bounded connection pool
+
+    Args:
+        pool_size (int): Maximum connections kept open per host
+
+    Returns:
+        requests.Session: The configured session
+    """
+    session = requests.Session()
+    # Retries are handled by get() so they go through the rate limiter
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# One pooled session per upstream host
+speedrun_session = create_session(SPEEDRUN_POOL_SIZE)
+github_session = create_session(GITHUB_POOL_SIZE)
+
+# Live, replay or record, chosen by UPSTREAM_MODE
+transport = create_transport(UPSTREAM_MODE, speedrun_session)
+
+# One limiter and one set of counters shared by every game module
+bucket = TokenBucket()
+stats = UpstreamStats()
+
+
+def _retry_after_seconds(value):
+    """
+    Parse a Retry-After header given as seconds or as an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the value cannot be parsed
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _retry_delay(response, attempt):
+    """
+    Work out how long to wait before retrying
+
+    Args:
+        response (requests.Response): The failed response, or None after a
+            connection error
+        attempt (int): Zero-based attempt number
+
+    Returns:
+        float: Seconds to sleep
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            # The server knows when it will accept us again; only guard against absurd values
+            delay = _retry_after_seconds(retry_after)
+            if delay is not None:
+                return min(SPEEDRUN_RETRY_AFTER_MAX, delay)
+    backoff = min(SPEEDRUN_BACKOFF_MAX, SPEEDRUN_BACKOFF_BASE * (2 ** attempt))
+    # Full jitter keeps parallel callers from retrying in lockstep
+    return random.uniform(0, backoff)
+
+
+def get(url, **kwargs):
+    """
+    Issue a rate-limited GET request to speedrun.com, retrying on throttling
+
+    Args:
+        url (str): Request URL
+        **kwargs: Passed through to the session; timeout defaults to
+            (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    Returns:
+        requests.Response: The final response
+
+    Raises:
+        RateLimitError: If every attempt was throttled
+        requests.exceptions.RequestException: If every attempt failed to connect
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    for attempt in range(SPEEDRUN_MAX_RETRIES + 1):
+        throttle_wait = bucket.acquire() if transport.paced else 0.0
+        stats.add(requests=1, throttle_wait=throttle_wait)
+        response = None
+        try:
+            response = transport.get(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == SPEEDRUN_MAX_RETRIES:
+                raise
+            logger.warning(f"Connection error from {url}: {str(e)}")
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            if response.status_code in RATE_LIMIT_STATUSES:
+                stats.add(rate_limited=1)
+            if attempt == SPEEDRUN_MAX_RETRIES:
+                if response.status_code in RATE_LIMIT_STATUSES:
+                    raise RateLimitError(
+                        f"Rate limited by speedrun.com after {attempt + 1} attempts", response=response)
+                return response
+            logger.warning(f"HTTP {response.status_code} from {url}")
+
+        delay = _retry_delay(response, attempt)
+        logger.debug(f"Retrying {url} in {delay:.2f}s (attempt {attempt + 2})")
+        stats.add(retries=1, backoff_wait=delay)
+        time.sleep(delay)
+
+
+def github_request(method, url, **kwargs):
+    """
+    Issue a request to the GitHub API on the pooled GitHub session
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        **kwargs: Passed through to the session; timeout defaults to
+            (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    Returns:
+        requests.Response: The response
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return github_session.request(method, url, **kwargs)
+
+
+def fetch_concurrently(keys, fetch):
+    """
+    Run fetch(key) for every key on a bounded thread pool
+
+    Args:
+        keys (iterable): Keys to fetch, e.g. category keys
+        fetch (callable): Function taking a single key
+
+    Returns:
+        list: (key, result, error) tuples in the order of keys, where error
+        is the exception raised by fetch or None
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    def run(key):
+        try:
+            return key, fetch(key), None
+        except Exception as e:
+            return key, None, e
+
+    with ThreadPoolExecutor(max_workers=min(SPEEDRUN_MAX_WORKERS, len(keys))) as executor:
+        return list(executor.map(run, keys))